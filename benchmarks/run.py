@@ -0,0 +1,198 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+"""Time and memory-profile each stage of the ParShift pipeline.
+
+Each stage (`read_ccsv`, `conv2turns`, `annotate`, `cond_probs`, `propensities` and
+`frequency_treemap`) is run on synthetic conversations of increasing size, in
+reply and target mode. Results are written to a JSON file and, if a baseline is
+given, compared with it, failing if any stage got slower than allowed.
+
+Example:
+
+    $ python benchmarks/run.py --sizes 1000 100000 --output results.json \\
+        --baseline benchmarks/baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import synthetic_conversation
+
+from parshift import (
+    annotate,
+    cond_probs,
+    conv2turns,
+    frequency_treemap,
+    propensities,
+    read_ccsv,
+)
+
+
+def _measure(function: Callable[[], Any], repeat: int) -> Tuple[Any, float, float]:
+    # Best wall time of `repeat` runs, and peak memory of an additional traced run
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, min(times), peak / 2**20
+
+
+def _plot(stats: pd.DataFrame):
+    frequency_treemap(stats)
+    plt.close("all")
+
+
+def run(sizes: List[int], modes: List[str], repeat: int, seed: int) -> List[Dict]:
+    """Benchmark all stages for each conversation size and mode."""
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for mode in modes:
+            for size in sizes:
+                path = os.path.join(tmpdir, f"{mode}_{size}.csv")
+                synthetic_conversation(size, mode=mode, seed=seed).to_csv(
+                    path, index=False
+                )
+
+                def record(stage: str, rows_out: int, seconds: float, peak: float):
+                    results.append(
+                        {
+                            "stage": stage,
+                            "mode": mode,
+                            "n_messages": size,
+                            "rows_out": rows_out,
+                            "time_s": round(seconds, 6),
+                            "peak_mb": round(peak, 3),
+                        }
+                    )
+                    print(
+                        f"{mode:12} {size:>9} {stage:18} {seconds:10.4f} s "
+                        f"{peak:10.2f} MiB",
+                        flush=True,
+                    )
+
+                conv, *measures = _measure(lambda: read_ccsv(path), repeat)
+                record("read_ccsv", len(conv), *measures)
+                turns, *measures = _measure(lambda: conv2turns(conv), repeat)
+                record("conv2turns", len(turns), *measures)
+                annotation, *measures = _measure(lambda: annotate(conv), repeat)
+                record("annotate", len(annotation), *measures)
+                stats, *measures = _measure(lambda: cond_probs(annotation), repeat)
+                record("cond_probs", len(stats), *measures)
+                props, *measures = _measure(lambda: propensities(stats), repeat)
+                record("propensities", len(props), *measures)
+                _, *measures = _measure(lambda: _plot(stats), repeat)
+                record("frequency_treemap", len(stats), *measures)
+
+    return results
+
+
+def _key(result: Dict) -> Tuple[str, str, int]:
+    return result["stage"], result["mode"], result["n_messages"]
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float) -> bool:
+    """Compare results with a baseline, reporting stages slower than allowed."""
+
+    previous = {_key(r): r for r in baseline}
+    ok = True
+    for result in results:
+        base = previous.get(_key(result))
+        if base is None:
+            continue
+        ratio = result["time_s"] / max(base["time_s"], 1e-9)
+        # Very short stages are dominated by noise
+        slower = ratio > tolerance and result["time_s"] - base["time_s"] > 1e-3
+        if slower:
+            ok = False
+        print(
+            f"{'SLOWER' if slower else 'ok':6} {result['mode']:12} "
+            f"{result['n_messages']:>9} {result['stage']:18} x{ratio:.2f} time, "
+            f"{result['peak_mb'] - base['peak_mb']:+.2f} MiB"
+        )
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000, 1000000],
+        help="numbers of messages of the synthetic conversations",
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        default=["reply_to_id", "target_id"],
+        choices=["reply_to_id", "target_id"],
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per stage")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file where results are written")
+    parser.add_argument("--baseline", help="JSON file with results to compare with")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=1.5,
+        help="maximum allowed ratio of time to baseline time",
+    )
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.modes, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(
+                {
+                    "environment": {
+                        "python": platform.python_version(),
+                        "platform": platform.platform(),
+                        "numpy": np.__version__,
+                        "pandas": pd.__version__,
+                    },
+                    "results": results,
+                },
+                file,
+                indent=2,
+            )
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        if not compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+"""Seeded generator of synthetic conversations for benchmarking ParShift."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+
+def synthetic_conversation(
+    n_messages: int,
+    n_speakers: int = 10,
+    mode: str = "reply_to_id",
+    reply_depth: int = 10,
+    group_ratio: float = 0.3,
+    continue_ratio: float = 0.3,
+    seed: int = 0,
+) -> pd.DataFrame:
+    """Generate a synthetic conversation, as read by `read_ccsv()`.
+
+    Arguments:
+        n_messages: Number of messages.
+        n_speakers: Number of speakers.
+        mode: Either `"reply_to_id"`, if messages reply to previous messages, or
+            `"target_id"`, if messages are addressed to speakers.
+        reply_depth: Messages reply to (or are addressed to the speaker of) one of
+            the previous `reply_depth` messages.
+        group_ratio: Proportion of messages addressed to the group.
+        continue_ratio: Proportion of messages sent by the speaker of the previous
+            message.
+        seed: Seed of the random number generator.
+
+    Returns:
+        A data frame with the conversation.
+    """
+
+    if mode not in ("reply_to_id", "target_id"):
+        raise ValueError("Parameter mode must be either `reply_to_id` or `target_id`")
+
+    rng = np.random.default_rng(seed)
+    idx = np.arange(n_messages)
+
+    # Speakers, where some messages continue the previous speaker's turn
+    speakers = rng.integers(n_speakers, size=n_messages)
+    keep = rng.random(n_messages) < continue_ratio
+    keep[:1] = False
+    speakers = speakers[np.maximum.accumulate(np.where(keep, 0, idx))]
+
+    # Previous message being replied to, if any
+    replied = idx - rng.integers(1, reply_depth + 1, size=n_messages)
+    to_group = (rng.random(n_messages) < group_ratio) | (replied < 0)
+    replied = np.maximum(replied, 0)
+
+    if mode == "reply_to_id":
+        targets = pd.array(np.where(to_group, 0, replied), dtype="Int64")
+    else:
+        targets = pd.array(np.where(to_group, 0, speakers[replied]), dtype="Int64")
+    targets[to_group] = pd.NA
+
+    return pd.DataFrame(
+        {
+            "utterance_id": idx,
+            "speaker_id": speakers.astype(str),
+            "utterance": [f"Message number {i}" for i in range(n_messages)],
+            mode: targets,
+        }
+    )
@@ -6,17 +6,48 @@
 
 __all__ = [
     "annotate",
+    "annotate_chunks",
+    "batch_stats",
+    "bootstrap_propensities",
     "cond_probs",
     "frequency_treemap",
     "conv2turns",
+    "process_many",
     "propensities",
+    "pshift_counts",
+    "profile",
     "pshift_class",
     "read_ccsv",
+    "read_cfeather",
+    "read_cparquet",
+    "render_annotation",
+    "rolling_stats",
+    "Cache",
+    "OnlineAnnotator",
     "Parshift",
 ]
 
 
-from parshift.annotation import annotate, conv2turns, pshift_class, read_ccsv
+from parshift.annotation import (
+    annotate,
+    conv2turns,
+    pshift_class,
+    read_ccsv,
+    read_cfeather,
+    read_cparquet,
+    render_annotation,
+)
+from parshift.bootstrap import bootstrap_propensities
+from parshift.cache import Cache
+from parshift.corpus import process_many
 from parshift.oo_parshift import Parshift
 from parshift.plotting import frequency_treemap
-from parshift.statistics import cond_probs, propensities
+from parshift.profiling import profile
+from parshift.statistics import (
+    batch_stats,
+    cond_probs,
+    propensities,
+    pshift_counts,
+    rolling_stats,
+)
+from parshift.streaming import OnlineAnnotator, annotate_chunks
@@ -4,12 +4,13 @@
 
 from __future__ import annotations
 
-import re
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal, Sequence, Tuple, overload
 
 import numpy as np
 import pandas as pd
-from pandas._typing import FilePath, ReadCsvBuffer
+from pandas._typing import FilePath, ReadBuffer, ReadCsvBuffer
+
+from .profiling import _profiled
 
 # Participation shift types
 _p_shift_dict = {
@@ -28,18 +29,83 @@ _p_shift_dict = {
     "AB-AY": "Turn Continuing",
 }
 
-# Expected column types
+# Participation shift codes, used as the categories of pshift columns
+_pshift_codes = tuple(_p_shift_dict)
+
+# Participation shift classes, in the order of their first code
+_pshift_classes = tuple(dict.fromkeys(_p_shift_dict.values()))
+
+# Table of the participation shift codes, indexed by code (in the order of
+# `_pshift_codes`), with their class, whether they imply a change of speaker (C) and
+# a directed remark (D), and their position in the `cond_probs()` data frame. The
+# attributes of many codes are obtained with a single `take` on its columns.
+_pshift_table = pd.DataFrame(
+    {
+        "class": pd.Categorical(
+            list(_p_shift_dict.values()), categories=_pshift_classes
+        ),
+        "C": [cls != "Turn Continuing" for cls in _p_shift_dict.values()],
+        "D": [code.startswith("AB") for code in _pshift_codes],
+        "cp_order": [4, 5, 10, 1, 0, 2, 6, 7, 8, 11, 3, 9, 12],
+    },
+    index=pd.CategoricalIndex(_pshift_codes, categories=_pshift_codes, name="Pshift"),
+)
+
+# Integer code of the group, as a target, in the participation shift kernel
+_GROUP = -1
+
+# All labels the participation shift kernel can produce, indexed by kernel output,
+# and the respective position in `_pshift_codes` (-1 if not a Gibson shift)
+_pshift_labels = np.array(
+    [f"A{b}-{c}{d}" for b in "0B" for c in "ABX" for d in "0ABY"], dtype=object
+)
+_pshift_label_codes = np.array(
+    [
+        _pshift_codes.index(lbl) if lbl in _pshift_codes else -1
+        for lbl in _pshift_labels
+    ],
+    dtype=np.int8,
+)
+
+# Categories of the pshift column of compact annotations: the participation shift
+# codes first, followed by the remaining labels the kernel can produce. Also, the
+# position in these categories of each label in `_pshift_labels`, and vice versa
+_pshift_categories = _pshift_codes + tuple(
+    lbl for lbl in _pshift_labels if lbl not in _pshift_codes
+)
+_pshift_category_codes = np.array(
+    [_pshift_categories.index(lbl) for lbl in _pshift_labels], dtype=np.int8
+)
+_pshift_category_labels = np.array(
+    [list(_pshift_labels).index(lbl) for lbl in _pshift_categories], dtype=np.int8
+)
+
+# Roles of a speaker in a participation shift: the speaker of the previous turn
+# (A), who initiates it, and the speaker of the current turn, who responds
+_speaker_roles = ("initiator", "responder")
+
+# Expected column types, after validation
 _p_shift_cols = {
     "utterance_id": np.int64,
     "speaker_id": str,
     "utterance": str,
-    "reply_to_id": object,
-    "target_id": object,
+    "reply_to_id": "Int64",
+    "target_id": "Int64",
 }
 
+# Column types given to the CSV parser; id columns are parsed as numbers by the
+# parser itself, and converted to their expected types on validation
+_csv_dtypes = {"speaker_id": str, "utterance": str}
+
+# Maximum number of offending rows reported by validation errors
+_MAX_ROWS_REPORTED = 10
+
 
+@_profiled("read_ccsv")
 def read_ccsv(
     filepath_or_buffer: FilePath | ReadCsvBuffer[bytes] | ReadCsvBuffer[str],
+    text: bool = True,
+    engine: str | None = None,
     **kwargs: Any,
 ) -> pd.DataFrame:
     """Read a conversation file in CSV format, validate it and return a data frame.
@@ -51,9 +117,21 @@ def read_ccsv(
     - `utterance`: The message itself (string)
     - `reply_to_id` or `target_id`: The reply ID or the target ID (int)
 
+    The `reply_to_id` or `target_id` column is converted into nullable integers
+    (`Int64`), where empty values, `None` and NaN are missing (i.e. the message is
+    addressed to the group). Ids which are not integers are reported, together with
+    their rows (counted from 0, not including the header).
+
     Arguments:
         filepath_or_buffer: Any valid string path to CSV file, as accepted by
             Pandas [`read_csv()`][pandas.read_csv] function.
+        text: If `False`, the `utterance` column is neither required nor read, which
+            saves time and memory when only the participation shift codes and
+            their statistics are needed. Default is `True`.
+        engine: Parser engine, `"c"`, `"python"` or `"pyarrow"`, as accepted by
+            Pandas [`read_csv()`][pandas.read_csv] function. The `"pyarrow"` engine
+            parses large files in parallel, and requires the `pyarrow` package.
+            Default is `None` (the `"c"` engine).
         **kwargs: Keyword parameters passed to Pandas
             [`read_csv()`][pandas.read_csv] function.
 
@@ -62,11 +140,116 @@ def read_ccsv(
             conversation.
     """
 
+    if engine is not None:
+        kwargs["engine"] = engine
+
+    # The pyarrow engine only accepts lists of columns, so the utterance column is
+    # dropped after reading instead
+    if not text and "usecols" not in kwargs and engine != "pyarrow":
+        kwargs["usecols"] = lambda col: col != "utterance"
+
     # Read the conversation file
-    conversation: pd.DataFrame = pd.read_csv(filepath_or_buffer, dtype=_p_shift_cols, **kwargs)  # type: ignore
+    conversation: pd.DataFrame = pd.read_csv(filepath_or_buffer, dtype=_csv_dtypes, **kwargs)  # type: ignore
+    if not text and "utterance" in conversation.columns:
+        conversation = conversation.drop(columns="utterance")
+
+    return _validate(conversation, text)
+
+
+def read_cparquet(
+    path: FilePath | ReadBuffer[bytes],
+    columns: Sequence[str] | None = None,
+    text: bool = True,
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """Read a conversation file in Parquet format, validate it and return a data frame.
+
+    The conversation file should have the same columns as the files read by
+    [`read_ccsv()`][parshift.annotation.read_ccsv]. Other columns are not read,
+    unless specified in `columns`. This function requires the `pyarrow` package.
+
+    Arguments:
+        path: Any valid string path to Parquet file, or a binary buffer, as accepted
+            by Pandas [`read_parquet()`][pandas.read_parquet] function.
+        columns: Columns to read. Default is `None` (the conversation columns).
+        text: If `False`, the `utterance` column is neither required nor read
+            (unless specified in `columns`). Default is `True`.
+        **kwargs: Keyword parameters passed to Pandas
+            [`read_parquet()`][pandas.read_parquet] function (e.g.
+            `dtype_backend="pyarrow"`, for Arrow-backed columns).
+
+    Returns:
+        A Pandas [`DataFrame`][pandas.DataFrame] containing the validated
+            conversation.
+    """
+
+    import pyarrow.parquet as pq
+
+    if columns is None:
+        columns = _conversation_columns(pq.read_schema(path).names, text)
+        _rewind(path)
+
+    return _validate(pd.read_parquet(path, columns=list(columns), **kwargs), text)
+
+
+def read_cfeather(
+    path: FilePath | ReadBuffer[bytes],
+    columns: Sequence[str] | None = None,
+    text: bool = True,
+    **kwargs: Any,
+) -> pd.DataFrame:
+    """Read a conversation file in Feather format, validate it and return a data frame.
+
+    The conversation file should have the same columns as the files read by
+    [`read_ccsv()`][parshift.annotation.read_ccsv]. Other columns are not read,
+    unless specified in `columns`. This function requires the `pyarrow` package.
+
+    Arguments:
+        path: Any valid string path to Feather file, or a binary buffer, as accepted
+            by Pandas [`read_feather()`][pandas.read_feather] function.
+        columns: Columns to read. Default is `None` (the conversation columns).
+        text: If `False`, the `utterance` column is neither required nor read
+            (unless specified in `columns`). Default is `True`.
+        **kwargs: Keyword parameters passed to Pandas
+            [`read_feather()`][pandas.read_feather] function (e.g.
+            `dtype_backend="pyarrow"`, for Arrow-backed columns).
+
+    Returns:
+        A Pandas [`DataFrame`][pandas.DataFrame] containing the validated
+            conversation.
+    """
+
+    import pyarrow.ipc as ipc
+
+    if columns is None:
+        columns = _conversation_columns(ipc.open_file(path).schema.names, text)
+        _rewind(path)
+
+    return _validate(pd.read_feather(path, columns=list(columns), **kwargs), text)
+
+
+def _conversation_columns(names: Sequence[str], text: bool = True) -> List[str]:
+    # Conversation columns available in a file, without the utterance column if
+    # `text` is False; missing ones are reported by `_validate()`
+    return [
+        col for col in _p_shift_cols if col in names and (text or col != "utterance")
+    ]
+
+
+def _rewind(path: Any):
+    # Go back to the start of a buffer after reading its schema
+    if hasattr(path, "seek"):
+        path.seek(0)
+
+
+def _validate(conversation: pd.DataFrame, text: bool = True) -> pd.DataFrame:
+    # Validate the columns of a conversation read from a CSV file, where the
+    # utterance column is not required if `text` is False
 
     # Obtain potentially missing columns
     missing = _p_shift_cols.keys() - conversation.columns
+    if not text:
+        missing.discard("utterance")
 
     # Check if we have missing columns
     if (
@@ -80,16 +263,175 @@ def read_ccsv(
         # If more than one column missing, we have a problem
         raise ValueError(f"CSV file is missing the `{'`, `'.join(missing)}` columns")
 
-    # Change Nan values to empty strings in the `reply_to_id` or `target_id` column
-    if "reply_to_id" in conversation.columns:
-        conversation["reply_to_id"] = conversation["reply_to_id"].fillna("")
-    else:
-        conversation["target_id"] = conversation["target_id"].fillna("")
+    # Convert the id columns into integers, once and for all
+    conversation["utterance_id"] = _as_utterance_ids(conversation["utterance_id"])
+    for col in ("reply_to_id", "target_id"):
+        if col in conversation.columns:
+            conversation[col] = _as_ids(conversation[col])
 
     return conversation
 
 
-def conv2turns(conv_df: pd.DataFrame) -> List[Dict[str, Any]]:
+def _row_numbers(mask: pd.Series) -> str:
+    # Describe the rows where a mask is True, for validation errors
+    rows = mask.index[mask.to_numpy()].tolist()
+    described = ", ".join(str(row) for row in rows[:_MAX_ROWS_REPORTED])
+    if len(rows) > _MAX_ROWS_REPORTED:
+        described += f" and {len(rows) - _MAX_ROWS_REPORTED} more"
+    return f"row{'s' if len(rows) > 1 else ''} {described}"
+
+
+def _as_utterance_ids(col: pd.Series) -> pd.Series:
+    # Convert the `utterance_id` column into integers, where missing ids are invalid
+    if pd.api.types.is_integer_dtype(col) and not col.hasnans:
+        return col if col.dtype == np.int64 else col.astype(np.int64)
+    ids = _as_ids(col)
+    missing = ids.isna()
+    if missing.any():
+        raise ValueError(
+            f"Column `{col.name}` has missing ids in {_row_numbers(missing)}"
+        )
+    return ids.astype(np.int64)
+
+
+def _target_col(conv_df: pd.DataFrame) -> str:
+    # Name of the column which identifies who a message is addressed to
+    if "reply_to_id" in conv_df.columns:
+        return "reply_to_id"
+    elif "target_id" in conv_df.columns:
+        return "target_id"
+    raise ValueError("Conversation is missing the `reply_to_id` or `target_id` column")
+
+
+def _as_ids(col: pd.Series) -> pd.Series:
+    # Convert a `reply_to_id`/`target_id` column into nullable integers, treating
+    # empty strings and "None" as missing values. Columns validated on reading are
+    # already converted, while ids which are not integers are reported with their
+    # rows
+    if isinstance(col.dtype, pd.Int64Dtype):
+        return col
+    if pd.api.types.is_integer_dtype(col):
+        return col.astype("Int64")
+    if not pd.api.types.is_numeric_dtype(col):
+        col = col.astype(object)
+        col = col.where(~col.isin(["", "None"]))
+    numbers = pd.to_numeric(col, errors="coerce")
+    invalid = (numbers.isna() & col.notna()) | (
+        numbers.notna() & (numbers != np.trunc(numbers))
+    )
+    if invalid.any():
+        raise ValueError(
+            f"Column `{col.name}` has ids which are not integers in "
+            f"{_row_numbers(invalid)}"
+        )
+    return numbers.astype("Int64")
+
+
+def _same_as_previous(col: pd.Series) -> np.ndarray:
+    # Element-wise comparison with the previous element, where two missing
+    # values are considered equal
+    prev = col.shift()
+    same = (col == prev).fillna(False) | (col.isna() & prev.isna())
+    return same.to_numpy(dtype=bool)
+
+
+def _by_conversation(conv_df: pd.DataFrame, group_by: str | None) -> pd.DataFrame:
+    # Messages grouped by conversation, keeping their order otherwise
+    if group_by is None:
+        return conv_df
+    conv_codes, _ = pd.factorize(conv_df[group_by], use_na_sentinel=False)
+    return conv_df.iloc[np.argsort(conv_codes, kind="stable")]
+
+
+def _turn_contents(
+    conv_df: pd.DataFrame, starts: np.ndarray, stops: np.ndarray, text: bool = True
+) -> Tuple[List[List[Any]], np.ndarray | None]:
+    # The utterance_ids and the text of turns spanning the given rows. Texts of single
+    # message turns are kept as they are, while the texts of the remaining turns are
+    # joined together. Texts are `None` if `text` is False or there is no utterance
+    # column.
+    bounds = list(zip(starts.tolist(), stops.tolist()))
+    ids = conv_df["utterance_id"].to_numpy().tolist()
+    ids_per_turn = [ids[start:end] for start, end in bounds]
+    if not text or "utterance" not in conv_df.columns:
+        return ids_per_turn, None
+
+    utterances = conv_df["utterance"].to_numpy(dtype=object)[starts]
+    merged = [t for t, (start, end) in enumerate(bounds) if end - start > 1]
+    if merged:
+        texts = conv_df["utterance"].astype(str).tolist()
+        utterances[merged] = [". ".join(texts[slice(*bounds[t])]) for t in merged]
+
+    return ids_per_turn, utterances
+
+
+@_profiled("turns")
+def _turns(
+    conv_df: pd.DataFrame,
+    group_by: str | None = None,
+    contents: bool = True,
+    text: bool = True,
+) -> Tuple[pd.DataFrame, pd.Series]:
+    # Columnar turn grouping engine: turn boundaries are found by comparing each
+    # message with the previous one, and then ids and texts are aggregated per turn.
+    # Besides the turns, an index mapping each utterance_id to its turn is returned,
+    # so that replies can be resolved with a single lookup. If `group_by` is given,
+    # messages are grouped by conversation first (keeping their order otherwise),
+    # turns never span two conversations, and the index is keyed by conversation
+    # and utterance_id. If `contents` is False, ids and texts are not aggregated,
+    # and turns are given by the `start` and `stop` rows of their messages instead.
+    # If `text` is False (or there is no utterance column), only ids are aggregated.
+    last_col = _target_col(conv_df)
+    conv_df = _by_conversation(conv_df, group_by)
+    targets = _as_ids(conv_df[last_col])
+    speakers = conv_df["speaker_id"]
+
+    new_turn = speakers.ne(speakers.shift()).to_numpy() | ~_same_as_previous(targets)
+    if group_by is not None:
+        new_turn |= ~_same_as_previous(conv_df[group_by])
+    new_turn[:1] = True
+    turn = np.cumsum(new_turn) - 1
+    starts = np.flatnonzero(new_turn)
+    stops = np.append(starts[1:], len(conv_df))[: len(starts)]
+
+    utterance_ids = conv_df["utterance_id"].to_numpy()
+    turn_index = pd.Series(
+        turn,
+        index=(
+            pd.MultiIndex.from_arrays([conv_df[group_by], utterance_ids])
+            if group_by is not None
+            else utterance_ids
+        ),
+    )
+    turn_index = turn_index[~turn_index.index.duplicated(keep="last")]
+
+    columns: Dict[str, Any]
+    if contents:
+        ids, utterances = _turn_contents(conv_df, starts, stops, text)
+        columns = {"utterance_ids": ids, "speaker_id": speakers.to_numpy()[starts]}
+        if utterances is not None:
+            columns["utterance"] = utterances
+    else:
+        columns = {
+            "start": starts,
+            "stop": stops,
+            "speaker_id": speakers.to_numpy()[starts],
+        }
+    columns[last_col] = targets.iloc[starts].array
+
+    turns_df = pd.DataFrame(columns)
+    if group_by is not None:
+        turns_df.insert(0, group_by, conv_df[group_by].to_numpy()[starts])
+    return turns_df, turn_index
+
+
+@_profiled("conv2turns")
+def conv2turns(
+    conv_df: pd.DataFrame,
+    as_frame: bool = False,
+    group_by: str | None = None,
+    text: bool = True,
+) -> List[Dict[str, Any]] | pd.DataFrame:
     """Take a conversation data frame and group it into conversation turns.
 
     A turn is a group of messages sent by the same user and addressed to the
@@ -97,105 +439,251 @@ def conv2turns(conv_df: pd.DataFrame) -> List[Dict[str, Any]]:
 
     Arguments:
         conv_df: The conversation from where to obtain the conversation turns.
+        as_frame: If `True`, return the turns as a data frame with one row per
+            turn instead of a list of dictionaries.
+        group_by: Column identifying the conversation of each message, if `conv_df`
+            contains several conversations (e.g. `"conversation_id"`). Turns of all
+            conversations are obtained at once, grouped by conversation. Default is
+            `None` (a single conversation).
+        text: If `False`, the texts of the messages of each turn are not joined,
+            and turns have no `utterance`. This is also the case if `conv_df` has no
+            `utterance` column (e.g. if read with `text=False`). Default is `True`.
 
     Returns:
-        A list of dictionaries, each representing a conversation turn.
+        A list of dictionaries, each representing a conversation turn, or a data
+            frame with the same information if `as_frame` is `True`.
     """
 
-    conv_df = conv_df.reset_index()
-    if "reply_to_id" in conv_df.columns:
-        last_col = "reply_to_id"
-    elif "target_id" in conv_df.columns:
-        last_col = "target_id"
-
-    conversation: List[Dict[str, Any]] = []
-    turn = 0
-
-    for index, row in conv_df.iterrows():
-        # If the row being looped has the same "speaker_id" and the "last_col" value,
-        # then merge the message text and message utterance_ids into the previous turn.
-
-        if row[last_col] == "" or row[last_col] == "None":
-            row[last_col] = None
-        row[last_col] = int(float(row[last_col])) if row[last_col] != None else None
-
-        if (
-            index != 0
-            and conversation[turn - 1]["speaker_id"] == row["speaker_id"]
-            and conversation[turn - 1][last_col] == row[last_col]
-        ):
-            msg_join = ". ".join(
-                [conversation[turn - 1]["utterance"], str(row["utterance"])]
-            )
-            list_id = conversation[turn - 1]["utterance_ids"] + [row["utterance_id"]]
-            conversation[turn - 1]["utterance_ids"] = list_id
-            conversation[turn - 1]["utterance"] = msg_join
-
-        # Otherwise, create a new dictionary representing a new turn
-        else:
-            id = row["utterance_id"]
-            speaker_id = row["speaker_id"]
-            utterance = row["utterance"]
-            last_col_val = row[last_col]
-
-            conversation.append(
-                {
-                    "utterance_ids": [id],
-                    "speaker_id": speaker_id,
-                    "utterance": utterance,
-                    last_col: (
-                        last_col_val
-                        if last_col_val != ""
-                        and last_col_val != None
-                        and last_col_val != "None"
-                        else None
-                    ),
-                }
-            )
+    turns_df, _ = _turns(conv_df, group_by, text=text)
+    if as_frame:
+        return turns_df
+    return _turn_records(turns_df)
 
-            # Increment the turn counter
-            turn += 1
 
+def _turn_records(turns_df: pd.DataFrame) -> List[Dict[str, Any]]:
+    # Convert a data frame of turns into a list of dictionaries, where missing
+    # targets are represented by `None`
+    last_col = str(turns_df.columns[-1])
+    conversation: List[Dict[str, Any]] = []
+    for turn in turns_df.to_dict("records"):
+        record = {str(k): v for k, v in turn.items()}
+        record[last_col] = None if pd.isna(record[last_col]) else int(record[last_col])
+        conversation.append(record)
     return conversation
 
 
-def _pshift_code(label: str) -> str:
-    # split the label into 4 parts
-    a = label.split(",")[0].split("to")[0].replace(" ", "")
-    b = label.split(",")[0].split("to")[1].replace(" ", "")
-    c = label.split(",")[1].split("to")[0].replace(" ", "")
-    d = label.split(",")[1].split("to")[1].replace(" ", "")
+def _pshift_kernel(
+    a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray
+) -> np.ndarray:
+    # Participation shift from "a to b" (previous turn) to "c to d" (current turn),
+    # where speakers and targets are integer codes and the group is `_GROUP`.
+    # Returns indexes into `_pshift_labels`.
 
     # Part 1 - always starts with A
-    result = "A"
 
-    # Parte 2 - "0" if the target is the group, "B" otherwise
-    result += "0-" if b == "group" else "B-"
+    # Part 2 - "0" if the target is the group, "B" otherwise
+    part_2 = b != _GROUP
+
+    # Part 3 - "A" if the speaker is the same, "B" if the speaker is the previous
+    # target, "X" otherwise
+    part_3 = np.where(c == a, 0, np.where(c == b, 1, 2))
+
+    # Part 4 - "0" if the current target is the group, "A" if the current target is
+    # the previous speaker, "B" if the target is the previous target, "Y" otherwise
+    part_4 = np.select([d == _GROUP, d == a, d == b], [0, 1, 2], 3)
+
+    return (12 * part_2 + 4 * part_3 + part_4).astype(np.int8)
+
+
+def _reply_labels(
+    spk: np.ndarray,
+    idx: np.ndarray,
+    has_target: np.ndarray,
+    ref: np.ndarray,
+    ref_spk: np.ndarray,
+    ref_has_target: np.ndarray,
+    ref2: np.ndarray,
+    ref2_spk: np.ndarray,
+    first: np.ndarray,
+    last_label: Tuple[int, int] = (_GROUP, _GROUP),
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Speakers and targets of the previous (a to b) and current (c to d) labels of
+    # turns in reply mode. `idx` is the position of each turn, `ref` the position of
+    # the turn it replies to (-1 if unknown), `ref_spk` and `ref_has_target` the
+    # speaker of that turn and whether it is a reply itself, and `ref2`/`ref2_spk`
+    # the position and speaker of the turn it replies to. `last_label` is the
+    # (speaker, target) label of the turn preceding the first one.
+
+    # replies to unknown or later turns are unresolved, and such turns repeat
+    # the "speaker to target" label of the previous turn
+    resolved = has_target & (ref >= 0) & (ref <= idx)
+    unresolved = np.concatenate([[False], has_target & ~resolved & ~first])
+    c = np.concatenate([[last_label[0]], spk])
+    d = np.concatenate([[last_label[1]], np.where(resolved, ref_spk, _GROUP)])
+    label_src = np.maximum.accumulate(np.where(unresolved, -1, np.arange(len(c))))
+    c, d = c[label_src], d[label_src]
+
+    # the previous label is the one of the turn being replied to, if that can
+    # be determined, or the label of the previous turn otherwise
+    to_group = resolved & ~ref_has_target
+    chain = resolved & ref_has_target & (ref2 >= 0) & (ref2 < idx)
+    a = np.where(to_group | chain, ref_spk, c[:-1])
+    b = np.where(to_group, _GROUP, np.where(chain, ref2_spk, d[:-1]))
+
+    return a, b, c[1:], d[1:]
+
+
+def _target_labels(
+    spk: np.ndarray, tgt: np.ndarray, last_label: Tuple[int, int] = (_GROUP, _GROUP)
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Speakers and targets of the previous (a to b) and current (c to d) labels of
+    # turns in target mode, where `last_label` is the (speaker, target) label of the
+    # turn preceding the first one
+    a = np.concatenate([[last_label[0]], spk[:-1]])
+    b = np.concatenate([[last_label[1]], tgt[:-1]])
+    return a, b, spk, tgt
+
+
+@_profiled("pshifts")
+def _pshift_turns(
+    turns_df: pd.DataFrame, turn_index: pd.Series, group_by: str | None = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    # Obtain the participation shift of each turn as an index into `_pshift_labels`,
+    # or -1 for the first turn of each conversation. Speakers and targets are
+    # factorized into integers, so the shift of all turns is determined at once by
+    # `_pshift_kernel()`. Who addresses whom is resolved along the way, so the
+    # initiator of each shift (speaker A), the speaker of each turn, the speaker it
+    # addresses (-1 if the group, or an unknown or later turn) and the names of the
+    # speakers are returned as well.
+    n = len(turns_df)
+    idx = np.arange(n)
+    last_col = str(turns_df.columns[-1])
+    speakers = turns_df["speaker_id"].astype(str).to_numpy()
+    targets = turns_df[last_col]
+    has_target = targets.notna().to_numpy()
+
+    # first turn of each conversation
+    first = np.zeros(n, dtype=bool)
+    first[:1] = True
+    if group_by is not None:
+        first |= ~_same_as_previous(turns_df[group_by])
+
+    if last_col == "reply_to_id":
+        spk, names = pd.factorize(speakers)
+
+        # turn being replied to, with -1 if the replied utterance is unknown
+        keys = pd.Index(targets[has_target].astype("int64"))
+        if group_by is not None:
+            keys = pd.MultiIndex.from_arrays([turns_df[group_by][has_target], keys])
+        pos = turn_index.index.get_indexer(keys)
+        ref = np.full(n, -1)
+        ref[has_target] = np.where(pos >= 0, turn_index.to_numpy()[pos], -1)
+
+        j = np.maximum(ref, 0)
+        ref2 = ref[j]
+        a, b, c, d = _reply_labels(
+            spk, idx, has_target, ref, spk[j], has_target[j], ref2, spk[ref2], first
+        )
+        resolved = has_target & (ref >= 0) & (ref <= idx)
+        spk, addressed = spk, np.where(resolved, spk[j], -1)
 
-    # Part 3 - "A" if the speaker is the same, "B" if the speaker is the previous target,
-    # "X" otherwise
-    if c == a:
-        result += "A"
-    elif c == b:
-        result += "B"
-    else:
-        result += "X"
-
-    # Part 4 - "0" if the current target is the group, "A" if the current target is previous
-    #  speaker, "B" if the target is the previous target, "Y" otherwise
-    if d == "group":
-        result += "0"
-    elif d == a:
-        result += "A"
-    elif d == b:
-        result += "B"
     else:
-        result += "Y"
-
-    return result
-
-
-def annotate(conv_df: pd.DataFrame) -> pd.DataFrame:
+        codes, names = pd.factorize(
+            np.concatenate([speakers, targets[has_target].astype(str).to_numpy()])
+        )
+        tgt = np.full(n, _GROUP)
+        tgt[has_target] = codes[n:]
+        a, b, c, d = _target_labels(codes[:n], tgt)
+        spk, addressed = codes[:n], tgt
+
+    pshifts = _pshift_kernel(a, b, c, d)
+
+    # we cannot calculate the pshift for the first turn
+    pshifts[first] = -1
+
+    return pshifts, a, spk, addressed, np.asarray(names, dtype=object)
+
+
+def _interaction_frames(
+    pshifts: np.ndarray,
+    initiators: np.ndarray,
+    spk: np.ndarray,
+    addressed: np.ndarray,
+    names: np.ndarray,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Sparse speaker by speaker count of the turns addressed by each speaker to each
+    # other (in coordinate format, with the speakers as categoricals sharing the
+    # same categories), and the count of each participation shift code by speaker
+    # and role, obtained with a single count over (speaker, role, code)
+    k = len(names)
+    speakers = pd.CategoricalDtype(pd.Index(names))
+
+    valid = addressed >= 0
+    pairs, turns = np.unique(
+        spk[valid].astype(np.int64) * k + addressed[valid], return_counts=True
+    )
+    interactions_df = pd.DataFrame(
+        {
+            "speaker_id": pd.Categorical.from_codes(
+                pairs // k, dtype=speakers  # type: ignore
+            ),
+            "addressee_id": pd.Categorical.from_codes(
+                pairs % k, dtype=speakers  # type: ignore
+            ),
+            "turns": turns,
+        }
+    )
+
+    codes = np.where(pshifts >= 0, _pshift_label_codes[np.maximum(pshifts, 0)], -1)
+    n_codes, n_roles = len(_pshift_codes), len(_speaker_roles)
+    speakers_by_role = np.concatenate([initiators, spk]).astype(np.int64)
+    roles = np.repeat(np.arange(n_roles), len(codes))
+    codes = np.tile(codes, n_roles)
+    valid = (codes >= 0) & (speakers_by_role >= 0)
+    counts = np.bincount(
+        (speakers_by_role[valid] * n_roles + roles[valid]) * n_codes + codes[valid],
+        minlength=k * n_roles * n_codes,
+    )
+    roles_df = pd.DataFrame(
+        counts.reshape(k, n_roles * n_codes),
+        index=pd.Index(names, name="speaker_id"),
+        columns=pd.MultiIndex.from_product(
+            [_speaker_roles, _pshift_codes], names=["role", "pshift"]
+        ),
+    )
+
+    return interactions_df, roles_df
+
+
+@overload
+def annotate(
+    conv_df: pd.DataFrame,
+    group_by: str | None = ...,
+    compact: bool = ...,
+    text: bool = ...,
+    interactions: Literal[False] = ...,
+) -> pd.DataFrame: ...
+
+
+@overload
+def annotate(
+    conv_df: pd.DataFrame,
+    group_by: str | None = ...,
+    compact: bool = ...,
+    text: bool = ...,
+    *,
+    interactions: Literal[True],
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: ...
+
+
+@_profiled("annotate")
+def annotate(
+    conv_df: pd.DataFrame,
+    group_by: str | None = None,
+    compact: bool = False,
+    text: bool = True,
+    interactions: bool = False,
+) -> pd.DataFrame | Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
     """Get Gibson's participation shift codes from turns in a conversation.
 
     Sequences of messages from a speaker to the same addressee are considered to
@@ -204,160 +692,222 @@ def annotate(conv_df: pd.DataFrame) -> pd.DataFrame:
 
     Arguments:
         conv_df: The conversation from where to obtain the participation shift codes.
+        group_by: Column identifying the conversation of each message, if `conv_df`
+            contains several conversations (e.g. `"conversation_id"`). All
+            conversations are annotated at once, and the first turn of each one has
+            no participation shift code. Default is `None` (a single conversation).
+        compact: If `True`, return the compact layout of the annotation, where the
+            messages of each turn are given by their `start` and `stop` rows in
+            `conv_df` (grouped by conversation, if `group_by` is given), speakers
+            (and targets, in target mode) are categoricals sharing the same
+            categories, and the pshift column is a categorical whose first 13
+            categories are the participation shift codes, missing for the first
+            turn. No utterance_ids or texts are aggregated. The default layout can
+            be obtained from the compact one with
+            [`render_annotation()`][parshift.annotation.render_annotation].
+            Default is `False`.
+        text: If `False`, the texts of the messages of each turn are not joined,
+            and the annotation has no `utterance` column. This is also the case if
+            `conv_df` has no `utterance` column (e.g. if read with `text=False`).
+            Statistics do not depend on the texts. Default is `True`.
+        interactions: If `True`, also return who addresses whom, as resolved while
+            annotating, and the participation shift codes of each speaker, by role.
+            Default is `False`.
 
     Returns:
-        A data frame with the participation shift codes for each turn.
+        A data frame with the participation shift codes for each turn. If
+            `group_by` is given, the first column identifies the conversation of
+            each turn, and turns are grouped by conversation. If `interactions` is
+            `True`, a tuple with this data frame and two others: the sparse speaker
+            by speaker matrix of the number of turns each speaker addressed to each
+            other, in coordinate format (`speaker_id`, `addressee_id` and `turns`
+            columns, where speakers are categoricals with the same categories, so
+            that, e.g., `scipy.sparse.coo_array((turns, (speaker_id.cat.codes,
+            addressee_id.cat.codes)))` gives the matrix), with turns addressed to
+            the group or to unknown messages left out; and the count of each
+            participation shift code in which each speaker (rows) took each role
+            (columns, by `role` and `pshift`), either `"initiator"` (the speaker A
+            of the previous turn, e.g. of "AB" in AB-BA) or `"responder"` (the
+            speaker of the turn). Speakers are the same across conversations, if
+            `group_by` is given.
     """
 
     if not isinstance(conv_df, pd.DataFrame):
         raise TypeError("Parameter conv_df must be a Pandas DataFrame")
 
-    conversation = conv2turns(conv_df)
+    turns_df, turn_index = _turns(conv_df, group_by, contents=not compact, text=text)
+    pshifts, *speakers = _pshift_turns(turns_df, turn_index, group_by)
 
-    # part1 will take the parshift label for the previous turn
-    part_1 = ""
+    if compact:
+        annotation = _compact_frame(turns_df, pshifts)
+    else:
+        annotation = _annotation_frame(turns_df, pshifts)
+    if interactions:
+        return (annotation, *_interaction_frames(pshifts, *speakers))
+    return annotation
 
-    # part2 will take the parshift label for the current turn
-    part_2 = ""
 
-    if "reply_to_id" in conv_df.columns:
-        annotate_df = pd.DataFrame(
-            {
-                "utterance_ids": [],
-                "speaker_id": [],
-                "utterance": [],
-                "reply_to_id": [],
-                "label_desc": [],
-                "pshift": [],
-            }
-        )
+def render_annotation(
+    annotation: pd.DataFrame, conv_df: pd.DataFrame, group_by: str | None = None
+) -> pd.DataFrame:
+    """Render a compact annotation in the default layout, with the utterance_ids and
+    texts of each turn.
 
-        # calculate the participation shift for each turn
-        for idx, msg in enumerate(conversation):
-            if (
-                msg["reply_to_id"] == None
-                or msg["reply_to_id"] == "None"
-                or msg["reply_to_id"] == ""
-            ):
-                part_2 = " " + str(msg["speaker_id"]) + " to group"
-            else:
-                for msgPrev in conversation[: idx + 1]:
-                    if msg["reply_to_id"] in msgPrev["utterance_ids"]:
-                        if (
-                            msgPrev["reply_to_id"] == None
-                            or msgPrev["reply_to_id"] == "None"
-                            or msgPrev["reply_to_id"] == ""
-                        ):
-                            part_1 = str(msgPrev["speaker_id"]) + " to group,"
-
-                        else:  # reply - reply
-                            for msgPrev2 in conversation[:idx]:
-                                if msgPrev["reply_to_id"] in msgPrev2["utterance_ids"]:
-                                    part_1 = (
-                                        str(msgPrev["speaker_id"])
-                                        + " to "
-                                        + str(msgPrev2["speaker_id"])
-                                        + ","
-                                    )
-
-                        part_2 = (
-                            " "
-                            + str(msg["speaker_id"])
-                            + " to "
-                            + str(msgPrev["speaker_id"])
-                        )
-
-            # p1p2 takes the parshift label for the previous + current turn
-            p1p2 = part_1 + part_2
-
-            # part_1 takes the part_2 label for the next iteration
-            part_1 = part_2[1:] + ","
-
-            # set value to "" for first turn
-            pshift_label = ""
-
-            # we cannot calculate the pshift for the first turn
-            if idx != 0:
-                pshift_label = _pshift_code(p1p2)
-
-            annotate_df.loc[len(annotate_df.index)] = [  # type: ignore
-                str(msg["utterance_ids"]),
-                str(msg["speaker_id"]),
-                msg["utterance"],
-                str(msg["reply_to_id"]),
-                p1p2,
-                pshift_label,
-            ]
+    Arguments:
+        annotation: The compact annotation, as returned by
+            [`annotate()`][parshift.annotation.annotate] with `compact=True`.
+        conv_df: The annotated conversation. If it has no `utterance` column, the
+            rendered annotation has no `utterance` column either.
+        group_by: Column identifying the conversation of each message, as given to
+            [`annotate()`][parshift.annotation.annotate]. Default is `None`.
 
-    elif "target_id" in conv_df.columns:
-        annotate_df = pd.DataFrame(
-            {
-                "utterance_ids": [],
-                "speaker_id": [],
-                "utterance": [],
-                "target_id": [],
-                "label_desc": [],
-                "pshift": [],
-            }
-        )
+    Returns:
+        A data frame equal to the one returned by
+            [`annotate()`][parshift.annotation.annotate] with `compact=False`.
+    """
 
-        # calculate the participation shift for each turn
-        for idx, msg in enumerate(conversation):
-            # if msg has no target, it is directed to the group
-            if (
-                msg["target_id"] == None
-                or msg["target_id"] == "None"
-                or msg["target_id"] == ""
-            ):
-                part_2 = " " + str(msg["speaker_id"]) + " to group"
-
-            # if msg has a target, we save it
-            else:
-                part_2 = " " + str(msg["speaker_id"]) + " to " + str(msg["target_id"])
-
-            # p1p2 takes the parshift label for the previous + current turn
-            p1p2 = part_1 + part_2
-
-            # part_1 takes the part_2 label for the next iteration
-            part_1 = part_2[1:] + ","
-
-            # set value to "" for first turn
-            pshift_label = ""
-
-            # we cannot calculate the pshift for the first turn
-            if idx != 0:
-                msg["label"] = p1p2
-                pshift_label = _pshift_code(p1p2)
-                msg["pshift"] = pshift_label
-
-            annotate_df.loc[len(annotate_df.index)] = [  # type: ignore
-                str(msg["utterance_ids"]),
-                str(msg["speaker_id"]),
-                msg["utterance"],
-                str(msg["target_id"]),
-                p1p2,
-                pshift_label,
-            ]
-
-    annotate_df.drop(columns=["label_desc"], inplace=True)
+    if not {"start", "stop"} <= set(annotation.columns):
+        raise ValueError("Parameter annotation must be a compact annotation")
+
+    last_col = _target_col(conv_df)
+    conv_df = _by_conversation(conv_df, group_by)
+    starts = annotation["start"].to_numpy()
+    ids, utterances = _turn_contents(conv_df, starts, annotation["stop"].to_numpy())
+    columns: Dict[str, Any] = {
+        "utterance_ids": ids,
+        "speaker_id": conv_df["speaker_id"].to_numpy()[starts],
+    }
+    if utterances is not None:
+        columns["utterance"] = utterances
+    columns[last_col] = _as_ids(conv_df[last_col]).iloc[starts].array
+    turns_df = pd.DataFrame(columns)
+    if group_by is not None:
+        turns_df.insert(0, group_by, conv_df[group_by].to_numpy()[starts])
+
+    codes = pd.Categorical(annotation["pshift"], categories=_pshift_categories).codes
+    pshifts = np.where(codes >= 0, _pshift_category_labels[codes], -1)
+
+    return _annotation_frame(turns_df, pshifts)
+
+
+def _compact_frame(turns_df: pd.DataFrame, pshifts: np.ndarray) -> pd.DataFrame:
+    # Build the compact annotation data frame from the turns (with the start and
+    # stop rows of their messages) and their participation shifts
+    last_col = str(turns_df.columns[-1])
+    speakers = turns_df["speaker_id"].astype(str)
+    targets: Any = turns_df[last_col]
+
+    if last_col == "target_id":
+        # Targets are speakers too, so both share the same categories
+        has_target = targets.notna().to_numpy()
+        names = pd.unique(
+            np.concatenate(
+                [speakers.to_numpy(), targets[has_target].astype(str).to_numpy()]
+            )
+        )
+        targets = pd.Categorical(
+            targets.astype(str).where(has_target), categories=names
+        )
+    else:
+        names = pd.unique(speakers.to_numpy())
+
+    codes = np.where(pshifts >= 0, _pshift_category_codes[np.maximum(pshifts, 0)], -1)
+    compact_df = pd.DataFrame(
+        {
+            "start": turns_df["start"].to_numpy(),
+            "stop": turns_df["stop"].to_numpy(),
+            "speaker_id": pd.Categorical(speakers, categories=names),
+            last_col: targets,
+            "pshift": pd.Categorical.from_codes(
+                codes, categories=_pshift_categories  # type: ignore
+            ),
+        }
+    )
+
+    # Conversation column, if any, goes first
+    if turns_df.columns[0] != "start":
+        compact_df.insert(0, turns_df.columns[0], turns_df.iloc[:, 0].to_numpy())
+
+    return compact_df
+
+
+def _annotation_frame(turns_df: pd.DataFrame, pshifts: np.ndarray) -> pd.DataFrame:
+    # Build the annotation data frame at once from the turns and their participation
+    # shifts; columns with few distinct values are stored as categoricals
+    last_col = str(turns_df.columns[-1])
+    targets = turns_df[last_col].astype(object)
+    columns = {
+        "utterance_ids": turns_df["utterance_ids"].astype(str).to_numpy(),
+        "speaker_id": pd.Categorical(turns_df["speaker_id"].astype(str)),
+    }
+    if "utterance" in turns_df.columns:
+        columns["utterance"] = turns_df["utterance"].to_numpy()
+    columns[last_col] = pd.Categorical(
+        targets.where(targets.notna(), "None").astype(str)
+    )
+    columns["pshift"] = pd.Categorical(
+        np.where(pshifts >= 0, _pshift_labels[pshifts], "")
+    )
+    annotate_df = pd.DataFrame(columns)
+
+    # Conversation column, if any, goes first
+    if turns_df.columns[0] != "utterance_ids":
+        annotate_df.insert(0, turns_df.columns[0], turns_df.iloc[:, 0].to_numpy())
 
     return annotate_df
 
 
-def pshift_class(pshift: str) -> str:
+def pshift_class(
+    pshift: str | Sequence[str] | np.ndarray | pd.Series,
+) -> str | np.ndarray | pd.Series:
     """Returns the participation shift class given a participation shift code.
 
     Arguments:
-        pshift: Participation shift code (e.g A0-XA).
+        pshift: Participation shift code (e.g A0-XA), or an array of such codes
+            (e.g. the pshift column of an annotation), where empty strings and
+            missing values stand for turns without a code. In arrays, labels
+            outside the 13 participation shift codes which
+            [`annotate()`][parshift.annotation.annotate] may produce (e.g. `AB-AA`
+            for a self-reply) have no class either.
 
     Returns:
         Participation shift classe in given the participation shift code (either
             "Turn Receiving", "Turn Claiming", "Turn Usurping" or  "Turn Continuing").
+            If `pshift` is an array, an array with the class of each code (missing
+            for turns without a code or class), or a categorical series with the
+            same index if `pshift` is a series.
     """
 
-    if not isinstance(pshift, str):
-        raise TypeError("Parameter pshift_code must be a String")
-    if not re.search("A[B|0]-[A|B|X][A|B|X|Y|0]", pshift):
-        raise ValueError("Parameter pshift_code must be a parshift code. eg: AB-B0")
-
-    return _p_shift_dict[pshift]
+    if isinstance(pshift, str):
+        if pshift not in _p_shift_dict:
+            raise ValueError("Parameter pshift_code must be a parshift code. eg: AB-B0")
+        return _p_shift_dict[pshift]
+    if not isinstance(
+        pshift, (list, tuple, np.ndarray, pd.Series, pd.Index, pd.Categorical)
+    ):
+        raise TypeError("Parameter pshift_code must be a String or an array")
+
+    classes = _pshift_table["class"].array.take(
+        _pshift_positions(pshift), allow_fill=True
+    )
+    if isinstance(pshift, pd.Series):
+        return pd.Series(classes, index=pshift.index)
+    return np.asarray(classes, dtype=object)
+
+
+def _pshift_positions(pshifts: Any) -> np.ndarray:
+    # Position of each participation shift code in `_pshift_codes` (i.e. its row in
+    # `_pshift_table`), or -1 for empty strings, missing values and the other labels
+    # of `_pshift_labels`. Distinct values are looked up once, so categorical columns
+    # are never expanded into strings
+    if isinstance(pshifts, (list, tuple)):
+        pshifts = np.asarray(pshifts, dtype=object)
+    codes, uniques = pd.factorize(pshifts)
+    values = pd.Index(np.asarray(uniques, dtype=object))
+    positions = _pshift_table.index.get_indexer(values)
+    invalid = (positions < 0) & ~values.isin(np.append(_pshift_labels, ""))
+    if invalid.any():
+        raise ValueError(
+            "Parameter pshift_code must only contain parshift codes. eg: AB-B0"
+        )
+    return np.where(codes >= 0, positions[codes], -1)
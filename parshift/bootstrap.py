@@ -0,0 +1,146 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+from __future__ import annotations
+
+import os
+from functools import partial
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+
+from .annotation import _pshift_codes
+from .corpus import _map
+from .statistics import _cond_probs_matrix, _propensities_matrix
+
+
+def _block_counts(starts: np.ndarray, codes: np.ndarray, block_size: int) -> np.ndarray:
+    # Participation shift counts of each resample (row of `starts`), made of the
+    # blocks of `block_size` turns beginning at each of its start positions, where
+    # the last block is cut so that each resample has as many turns as `codes` (the
+    # position in `_pshift_codes` of each turn's code). Block counts are the
+    # differences of the running counts at their ends, added one block (column) at
+    # a time so that memory is proportional to the number of resamples. Running
+    # counts are determined here, since they are much larger than the codes sent
+    # to worker processes.
+    n = len(codes)
+    running = np.zeros((n + 1, len(_pshift_codes)), dtype=np.int64)
+    running[np.arange(1, n + 1), codes] = 1
+    np.cumsum(running, axis=0, out=running)
+
+    counts = np.zeros((len(starts), running.shape[1]), dtype=np.int64)
+    for j in range(starts.shape[1]):
+        size = min(block_size, n - j * block_size)
+        counts += running[starts[:, j] + size] - running[starts[:, j]]
+    return counts
+
+
+def bootstrap_propensities(
+    pshift_codes: pd.DataFrame | pd.Series,
+    n_resamples: int = 1000,
+    confidence: float = 0.95,
+    block_size: int | None = None,
+    seed: int | np.random.Generator | None = None,
+    max_workers: int | None = 1,
+) -> pd.DataFrame:
+    """Estimate confidence intervals of the propensities of a conversation by
+    bootstrapping its participation shift codes.
+
+    All resamples are drawn at once. In the (default) bootstrap, turns are
+    resampled independently, so the participation shift counts of all resamples are
+    drawn from a single multinomial distribution with the observed frequencies. In
+    the block bootstrap, which preserves the dependence between consecutive turns,
+    each resample is made of randomly placed blocks of `block_size` consecutive
+    turns (a moving block bootstrap), all drawn as one matrix of block starts. The
+    propensities of all resamples are then determined at once, and the confidence
+    intervals are given by their percentiles.
+
+    Arguments:
+        pshift_codes: A sequence of participation shift code obtained with
+            [`annotate()`][parshift.annotation.annotate], or the frequency table of
+            such a sequence, as returned by
+            [`pshift_counts()`][parshift.statistics.pshift_counts] (only for the
+            bootstrap, since blocks require the sequence). Turns without a code are
+            ignored.
+        n_resamples: Number of resamples. Default is 1000.
+        confidence: Confidence level of the intervals. Default is 0.95.
+        block_size: Number of consecutive turns in each block, for the block
+            bootstrap. Default is `None` (bootstrap of independent turns).
+        seed: Seed or NumPy [`Generator`][numpy.random.Generator] from where
+            resamples are drawn. Default is `None` (unpredictable resamples).
+        max_workers: Number of worker processes among which the resamples of the
+            block bootstrap are split, which pays off for long conversations and
+            many resamples. Default is 1 (resamples are determined in the current
+            process). If `None`, the number of processors in the machine. Results
+            do not depend on the number of workers.
+
+    Returns:
+        A data frame with the propensities, as returned by
+            [`propensities()`][parshift.statistics.propensities], in the `estimate`
+            row, and the lower and upper bounds of their confidence intervals in the
+            `lower` and `upper` rows.
+    """
+
+    if not isinstance(n_resamples, int) or n_resamples < 1:
+        raise ValueError("Parameter n_resamples must be a positive integer")
+    if not 0 < confidence < 1:
+        raise ValueError("Parameter confidence must be between 0 and 1")
+
+    if isinstance(pshift_codes, pd.Series):
+        if block_size is not None:
+            raise ValueError("Block bootstrap requires a sequence of pshift codes")
+        counts = pshift_codes.reindex(_pshift_codes, fill_value=0).to_numpy(
+            dtype=np.int64
+        )
+    elif isinstance(pshift_codes, pd.DataFrame):
+        # Only turns with a code are resampled, so that blocks span turns with codes
+        codes = pd.Categorical(pshift_codes["pshift"], categories=_pshift_codes).codes
+        codes = codes[codes >= 0]
+        counts = np.bincount(codes, minlength=len(_pshift_codes))
+    else:
+        raise TypeError("Parameter pshift_codes must be a Dataframe or a Series")
+
+    n = int(counts.sum())
+    if n == 0:
+        raise ValueError("There are no participation shift codes to resample")
+    rng = np.random.default_rng(seed)
+
+    if block_size is None:
+        resampled = rng.multinomial(n, counts / n, size=n_resamples)
+    else:
+        if not isinstance(block_size, int) or not 1 <= block_size <= n:
+            raise ValueError(
+                "Parameter block_size must be a positive integer, up to the "
+                "number of pshift codes"
+            )
+        n_blocks = -(-n // block_size)
+        starts = rng.integers(0, n - block_size + 1, size=(n_resamples, n_blocks))
+
+        workers = max_workers or os.cpu_count() or 1
+        chunks: List[Any] = np.array_split(starts, min(workers, n_resamples))
+        resampled = np.concatenate(
+            _map(
+                partial(_block_counts, codes=codes, block_size=block_size),
+                chunks,
+                max_workers,
+                1,
+            )
+        )
+
+    _, cp, cpetc = _cond_probs_matrix(counts[np.newaxis])
+    estimate = _propensities_matrix(cp, cpetc)
+
+    # Propensities of the resamples are not rounded, so that their percentiles are
+    # not limited to steps of 0.01
+    _, cp, cpetc = _cond_probs_matrix(resampled, rounded=False)
+    props = _propensities_matrix(cp, cpetc).to_numpy()
+    alpha = (1 - confidence) / 2
+    bounds = np.quantile(props, [alpha, 1 - alpha], axis=0)
+
+    return pd.DataFrame(
+        np.vstack([estimate.to_numpy(), bounds]),
+        index=["estimate", "lower", "upper"],
+        columns=estimate.columns,
+    )
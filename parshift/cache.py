@@ -0,0 +1,172 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Any, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Version of the layout of cached entries, changed whenever that layout changes
+_CACHE_FORMAT = 1
+
+# Extension of cached entries
+_SUFFIX = ".pkl"
+
+# Size of the blocks in which input files are hashed
+_BLOCK_SIZE = 2**20
+
+
+def _version() -> str:
+    # Version of the installed package, which is part of every cache key, together
+    # with the versions of pandas and NumPy, whose objects are pickled in entries
+    try:
+        return version("parshift")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def cache_key(data: bytes, **options: Any) -> str:
+    """Determine the key of a cache entry.
+
+    The key is a hash of the input bytes, the ParShift, pandas and NumPy versions and
+    the options affecting the result, so that entries are never reused for different
+    inputs, versions or options.
+
+    Arguments:
+        data: The contents of the input (e.g. of a conversation file), or a digest
+            of them.
+        **options: Options affecting the result (their values must have a stable
+            `repr()`).
+
+    Returns:
+        The key of the cache entry, as an hexadecimal string.
+    """
+
+    digest = hashlib.sha256(data)
+    versions = (_version(), pd.__version__, np.__version__)
+    digest.update(repr((_CACHE_FORMAT, versions, sorted(options.items()))).encode())
+    return digest.hexdigest()
+
+
+def _input_digest(filepath_or_buffer: Any) -> Tuple[bytes, Any]:
+    # Digest of the contents of a path or buffer, and a source from where they can be
+    # read again. Files are hashed in blocks and read again from disk, while buffers
+    # may not be seekable, so their contents are kept in memory
+    digest = hashlib.sha256()
+    if isinstance(filepath_or_buffer, (str, os.PathLike)):
+        with open(filepath_or_buffer, "rb") as file:
+            for block in iter(lambda: file.read(_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.digest(), filepath_or_buffer
+    data = filepath_or_buffer.read()
+    if isinstance(data, str):
+        digest.update(data.encode())
+        return digest.digest(), io.StringIO(data)
+    digest.update(data)
+    return digest.digest(), io.BytesIO(data)
+
+
+class Cache:
+    """On-disk cache of results, addressed by the contents of their inputs.
+
+    Each entry is stored in its own file, in a binary (pickle) format. When the total
+    size of the entries exceeds `max_size`, the least recently used ones are removed.
+    Entries which can't be loaded (e.g. corrupted files) are removed and count as
+    missing.
+
+    Warning:
+        Loading a pickle file may run arbitrary code, so the directory must only be
+        writable by trusted users. It is created accessible only by its owner.
+
+    Arguments:
+        directory: Directory where entries are stored, created if it doesn't exist.
+        max_size: Maximum total size of the entries, in bytes. Default is 1 GiB.
+    """
+
+    def __init__(self, directory: str | os.PathLike, max_size: int = 2**30):
+        if not isinstance(max_size, int) or max_size < 0:
+            raise ValueError("Parameter max_size must be a non-negative integer")
+
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def get(self, key: str) -> Any:
+        """Get a cache entry.
+
+        Arguments:
+            key: The key of the entry, as returned by
+                [`cache_key()`][parshift.cache.cache_key].
+
+        Returns:
+            The cached value, or `None` if there is no such entry.
+        """
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                value = pickle.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # Truncated or corrupted entries, or entries of objects which can't be
+            # loaded by the installed libraries, are recomputed
+            path.unlink(missing_ok=True)
+            return None
+
+        # Mark the entry as recently used
+        os.utime(path)
+        return value
+
+    def put(self, key: str, value: Any):
+        """Store a cache entry, removing the least recently used entries if the cache
+        gets too large.
+
+        Arguments:
+            key: The key of the entry, as returned by
+                [`cache_key()`][parshift.cache.cache_key].
+            value: The value to store, which must be picklable.
+        """
+
+        # Write to a temporary file first, so that incomplete entries are never read
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as file:
+            pickle.dump(value, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+
+        self._evict()
+
+    def clear(self):
+        """Remove all cache entries."""
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            path.unlink(missing_ok=True)
+
+    def _evict(self):
+        # Remove the least recently used entries until the cache fits in max_size
+        entries = []
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries, key=lambda entry: entry[0]):
+            if size <= self.max_size:
+                break
+            path.unlink(missing_ok=True)
+            size -= entry_size
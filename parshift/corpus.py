@@ -0,0 +1,174 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Hashable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas._typing import FilePath, ReadCsvBuffer
+
+from .annotation import annotate, read_ccsv
+from .statistics import (
+    _cond_probs_counts,
+    _grouped_pshift_counts,
+    cond_probs,
+    propensities,
+)
+
+
+def _process_one(
+    conversation: FilePath | pd.DataFrame, **kwargs: Any
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # Read (if required), annotate and determine the statistics of one conversation
+    if not isinstance(conversation, pd.DataFrame):
+        conversation = read_ccsv(conversation, **kwargs)
+    stats = cond_probs(annotate(conversation))
+    return stats, propensities(stats)
+
+
+def _process_grouped(
+    conversations: pd.DataFrame, group_by: str
+) -> List[Tuple[pd.DataFrame, pd.DataFrame]]:
+    # Annotate several conversations at once and determine the statistics of each
+    # one from the grouped participation shift counts
+    annotation = annotate(conversations, group_by=group_by)
+    results = []
+    for counts in _grouped_pshift_counts(annotation, group_by).to_numpy():
+        stats = _cond_probs_counts(counts)
+        results.append((stats, propensities(stats)))
+    return results
+
+
+def _map(
+    function: Callable, items: List[Any], max_workers: int | None, chunksize: int
+) -> List[Any]:
+    # Apply function to all items, in a pool of processes if more than one worker
+    if max_workers == 1:
+        return list(map(function, items))
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(function, items, chunksize=chunksize))
+
+
+def process_many(
+    conversations: (
+        Sequence[FilePath | ReadCsvBuffer[bytes] | ReadCsvBuffer[str]]
+        | Mapping[Hashable, FilePath | ReadCsvBuffer[bytes] | ReadCsvBuffer[str]]
+        | pd.DataFrame
+    ),
+    group_by: str = "conversation_id",
+    max_workers: int | None = None,
+    chunksize: int | None = None,
+    **kwargs: Any,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Determine the statistics and propensities of many conversations in parallel.
+
+    Each conversation is read with [`read_ccsv()`][parshift.annotation.read_ccsv],
+    annotated with [`annotate()`][parshift.annotation.annotate] and its
+    statistics determined with [`cond_probs()`][parshift.statistics.cond_probs]
+    and [`propensities()`][parshift.statistics.propensities]. Conversations are
+    distributed in chunks over a pool of processes.
+
+    Arguments:
+        conversations: The conversations to process, either as a sequence of paths
+            or buffers (as accepted by [`read_ccsv()`][parshift.annotation.read_ccsv]),
+            a mapping of conversation keys to paths or buffers, or a data frame with
+            several conversations identified by the `group_by` column.
+        group_by: Column identifying the conversation of each message when
+            `conversations` is a data frame. Default is `"conversation_id"`. Each
+            worker annotates its chunk of conversations at once, as done by
+            [`annotate()`][parshift.annotation.annotate] with `group_by`.
+        max_workers: Number of worker processes. Default is `None` (number of
+            processors in the machine). If `1`, conversations are processed in the
+            current process.
+        chunksize: Number of conversations sent to a worker at a time. Default is
+            `None`, in which case conversations are split evenly into four chunks per
+            worker.
+        **kwargs: Keyword parameters passed to Pandas
+            [`read_csv()`][pandas.read_csv] function.
+
+    Returns:
+        A tuple with two data frames: the statistics of all conversations stacked,
+            indexed by conversation key and participation shift position; and the
+            propensities, indexed by conversation key. Conversation keys are the
+            mapping keys, the `group_by` values, the paths (as strings) or, for
+            buffers, the position in the sequence.
+    """
+
+    keys: List[Hashable]
+    results: List[Tuple[pd.DataFrame, pd.DataFrame]]
+    workers = max_workers or os.cpu_count() or 1
+
+    if isinstance(conversations, pd.DataFrame):
+        if group_by not in conversations.columns:
+            raise ValueError(f"Data frame is missing the `{group_by}` column")
+
+        # Conversations are placed contiguously and split in chunks, each of them
+        # annotated at once by a worker
+        conv_codes, conv_keys = pd.factorize(conversations[group_by])
+        order = np.argsort(conv_codes, kind="stable")
+        conv_codes = conv_codes[order]
+        conversations = conversations.iloc[order[conv_codes >= 0]]
+        conv_codes = conv_codes[conv_codes >= 0]
+        keys = list(conv_keys)
+        if chunksize is None:
+            chunksize = max(1, len(keys) // (4 * workers))
+        if max_workers == 1:
+            chunksize = max(1, len(keys))
+        bounds = np.searchsorted(conv_codes, np.arange(0, len(keys), chunksize))
+        chunks = np.split(np.arange(len(conversations)), bounds[1:])
+        parts = _map(
+            partial(_process_grouped, group_by=group_by),
+            [conversations.iloc[chunk] for chunk in chunks if len(chunk) > 0],
+            max_workers,
+            1,
+        )
+        results = [result for part in parts for result in part]
+
+    else:
+        items: List[Any]
+        if isinstance(conversations, Mapping):
+            keys = list(conversations.keys())
+            items = list(conversations.values())
+        elif isinstance(conversations, Sequence) and not isinstance(
+            conversations, (str, bytes)
+        ):
+            keys = [
+                str(conv) if isinstance(conv, (str, os.PathLike)) else i
+                for i, conv in enumerate(conversations)
+            ]
+            items = list(conversations)
+        else:
+            raise TypeError(
+                "Parameter conversations must be a sequence, a mapping or a DataFrame"
+            )
+
+        # Buffers are read here, since they can't be shared with other processes
+        items = [
+            (
+                item
+                if isinstance(item, (str, os.PathLike, pd.DataFrame))
+                else read_ccsv(item, **kwargs)
+            )
+            for item in items
+        ]
+
+        if chunksize is None:
+            chunksize = max(1, len(items) // (4 * workers))
+        results = _map(partial(_process_one, **kwargs), items, max_workers, chunksize)
+
+    if len(results) == 0:
+        return pd.DataFrame(), pd.DataFrame()
+
+    stats = pd.concat(
+        [stats for stats, _ in results], keys=keys, names=["conversation", None]
+    )
+    props = pd.concat([props for _, props in results], ignore_index=True)
+    props.index = pd.Index(keys, name="conversation")
+
+    return stats, props
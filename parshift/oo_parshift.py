@@ -4,15 +4,24 @@
 
 from __future__ import annotations
 
-from typing import Any, List
+import os
+from typing import Any, Callable, Dict, List, Sequence, Tuple
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
-from pandas._typing import FilePath, ReadCsvBuffer
+from pandas._typing import FilePath, ReadBuffer, ReadCsvBuffer
 
 from .annotation import annotate, read_ccsv
-from .plotting import frequency_treemap
-from .statistics import cond_probs, propensities
+from .cache import Cache, _input_digest, cache_key
+from .plotting import _frequencies, _plot_treemap, _pyplot
+from .profiling import _profiled, profile as _profile
+from .statistics import (
+    _cond_probs_counts,
+    _running_counts,
+    _speaker_profiles,
+    cond_probs,
+    propensities,
+)
 
 
 class Parshift:
@@ -23,13 +32,74 @@ class Parshift:
     ):
         """Parshift initialization"""
 
+        # Results derived from the annotation and stats (e.g. propensities and plot
+        # data), determined when first needed
+        self._derived: Dict[Any, Any] = {}
+        # Parts in which the conversation is split, as given to `process()`
+        self._parts: Tuple[int, Sequence[int] | None] = (1, None)
+        # Report of the stages of the last `process()`, if profiled
+        self.profile: pd.DataFrame | None = None
+        self._stats: pd.DataFrame | List[pd.DataFrame] | None = None
+        # Who addresses whom and the pshift counts of each speaker, if determined
+        # by the last `process()`
+        self.interactions: pd.DataFrame | None = None
+        self.speaker_counts: pd.DataFrame | None = None
+
         self.annotation = annotation
-        self.stats = stats
+        if stats is not None:
+            self.stats = stats
+
+    @property
+    def annotation(self) -> pd.DataFrame | None:
+        """Data frame with the participation shift codes of each turn, as returned by
+        [`annotate()`][parshift.annotation.annotate]. Setting it invalidates the
+        stats, any results derived from them and the interactions."""
+        return self._annotation
+
+    @annotation.setter
+    def annotation(self, annotation: pd.DataFrame | None):
+        self._annotation = annotation
+        self.interactions = self.speaker_counts = None
+        self.invalidate()
+
+    @property
+    def stats(self) -> pd.DataFrame | List[pd.DataFrame] | None:
+        """Data frame with the conditional probabilities, as returned by
+        [`cond_probs()`][parshift.statistics.cond_probs], or a list of such data
+        frames, one per part, if the conversation is split. If not available, they
+        are determined from the annotation when first needed."""
+        if self._stats is None and self._annotation is not None:
+            self._split_stats(*self._parts)
+        return self._stats
+
+    @stats.setter
+    def stats(self, stats: pd.DataFrame | List[pd.DataFrame] | None):
+        self._stats = stats
+        self._derived.clear()
+
+    def invalidate(self):
+        """Discard the stats and the results derived from them (e.g. propensities),
+        which are determined again from the annotation when next needed. This is
+        required if the annotation data frame is modified in place."""
+        if self._annotation is not None:
+            self._stats = None
+        self._derived.clear()
+
+    def _memoized(self, key: Any, function: Callable[[], Any]) -> Any:
+        # Result derived from the stats, determined only once until invalidated
+        if key not in self._derived:
+            self._derived[key] = function()
+        return self._derived[key]
 
     def process(
         self,
         filepath_or_buffer: FilePath | ReadCsvBuffer[bytes] | ReadCsvBuffer[str],
         N: int = 1,
+        boundaries: Sequence[int] | None = None,
+        cache: Cache | str | os.PathLike | None = None,
+        profile: bool = False,
+        text: bool = True,
+        interactions: bool = False,
         **kwargs: Any,
     ):
         """Read a conversation file in CSV format, validate it,
@@ -48,31 +118,157 @@ class Parshift:
             filepath_or_buffer: Any valid string path to CSV file, as accepted by
                 Pandas [`read_csv()`][pandas.read_csv] function.
             N: Number of parts to split the conversation into. Default is 1 (all conversation).
-                `N` should be between 1 and 4.
+                `N` should be a positive integer.
+            boundaries: Turns at which each part of the conversation starts, other than
+                the first one (e.g. `[100, 200]` splits the conversation into turns
+                0-99, 100-199 and 200 onwards). If given, `N` is ignored. Default is
+                `None`.
+            cache: A [`Cache`][parshift.cache.Cache], or the directory of one, where
+                the annotation and stats are kept, keyed by the contents of the
+                conversation file, the ParShift version and the remaining parameters.
+                If the same file was already processed with the same parameters, the
+                results are loaded from the cache instead. Default is `None` (no cache).
+            profile: If `True`, record the wall time, rows in and out and peak memory
+                of each stage, as done by [`profile()`][parshift.profiling.profile],
+                in Parshift.profile. Default is `False`.
+            text: If `False`, the `utterance` column is neither required nor read,
+                and the annotation has no `utterance` column, which saves time and
+                memory when only the statistics are needed. Default is `True`.
+            interactions: If `True`, keep who addresses whom and the participation
+                shift codes of the turns of each speaker, as determined by
+                [`annotate()`][parshift.annotation.annotate] with `interactions`, in
+                Parshift.interactions and Parshift.speaker_counts. Default is
+                `False`.
             **kwargs: Keyword parameters passed to Pandas
                 [`read_csv()`][pandas.read_csv] function.
 
         - Parshift.annotation will be data frame equal as returned by [`annotate()`][parshift.annotation.annotate].
-        - Parshift.stats will be data frame equal as returned by [`cond_probs()`][parshift.statistics.cond_probs].
+        - Parshift.stats will be data frame equal as returned by [`cond_probs()`][parshift.statistics.cond_probs],
+          or a list of such data frames, one per part, if the conversation is split.
+        - Parshift.profile will be data frame equal as returned by [`Profile.report()`][parshift.profiling.Profile.report]
+          if `profile` is `True`, or `None` otherwise.
+        - Parshift.interactions and Parshift.speaker_counts will be the data frames
+          returned by [`annotate()`][parshift.annotation.annotate] with `interactions`
+          if `interactions` is `True`, or `None` otherwise.
         """
 
-        df_annotate = annotate(read_ccsv(filepath_or_buffer, **kwargs))
-        self.annotation = df_annotate
+        if boundaries is None and (not isinstance(N, int) or N < 1):
+            raise ValueError("N should be a positive integer.")
+
+        self.profile = None
+        options = (N, boundaries, cache, text, interactions)
+        if profile:
+            with _profile() as recording:
+                self._process(filepath_or_buffer, *options, **kwargs)
+            self.profile = recording.report()
+        else:
+            self._process(filepath_or_buffer, *options, **kwargs)
+
+    def _process(
+        self,
+        filepath_or_buffer: FilePath | ReadCsvBuffer[bytes] | ReadCsvBuffer[str],
+        N: int,
+        boundaries: Sequence[int] | None,
+        cache: Cache | str | os.PathLike | None,
+        text: bool,
+        interactions: bool,
+        **kwargs: Any,
+    ):
+        # Read, annotate and determine the stats of a conversation, or get them from
+        # the cache
+        if cache is not None:
+            if not isinstance(cache, Cache):
+                cache = Cache(cache)
+            digest, filepath_or_buffer = _input_digest(filepath_or_buffer)
+            key = cache_key(
+                digest,
+                N=N,
+                boundaries=None if boundaries is None else list(boundaries),
+                text=text,
+                interactions=interactions,
+                kwargs=sorted(kwargs.items()),
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                self.annotation, self.stats, *extra = cached
+                if interactions:
+                    self.interactions, self.speaker_counts = extra
+                self._parts = (N, boundaries)
+                return
+
+        conv_df = read_ccsv(filepath_or_buffer, text=text, **kwargs)
+        if interactions:
+            annotation, interactions_df, speaker_counts = annotate(
+                conv_df, text=text, interactions=True
+            )
+            self.annotation = annotation
+            self.interactions, self.speaker_counts = interactions_df, speaker_counts
+        else:
+            self.annotation = annotate(conv_df, text=text)
+        self._parts = (N, boundaries)
+        self._split_stats(N, boundaries)
+
+        if cache is not None:
+            results: List[Any] = [self.annotation, self.stats]
+            if interactions:
+                results += [self.interactions, self.speaker_counts]
+            cache.put(key, tuple(results))
+
+    def load(
+        self,
+        path: FilePath | ReadBuffer[bytes],
+        format: str = "parquet",
+        N: int = 1,
+        boundaries: Sequence[int] | None = None,
+    ):
+        """Load an annotation saved with [`write_annotation()`][parshift.Parshift.write_annotation]
+        and determine its conditional probabilities, as done by [`process()`][parshift.Parshift.process].
+
+        Arguments:
+            path: Any valid string path to the annotation file, or a binary buffer.
+            format: Format of the file, either `"parquet"` (default) or `"feather"`.
+            N: Number of parts to split the conversation into. Default is 1 (all conversation).
+            boundaries: Turns at which each part of the conversation starts, other than
+                the first one. If given, `N` is ignored. Default is `None`.
+        """
 
-        if N == 1:
-            self.stats = cond_probs(df_annotate)
-        elif N in [2, 3, 4]:
-            list_stats = []
-            size = len(df_annotate)
+        if boundaries is None and (not isinstance(N, int) or N < 1):
+            raise ValueError("N should be a positive integer.")
+
+        self.annotation = _read_columnar(path, format)
+        self._parts = (N, boundaries)
+        self._split_stats(N, boundaries)
+
+    @_profiled("stats")
+    def _split_stats(self, N: int, boundaries: Sequence[int] | None):
+        # Determine the stats of the annotation, or of each of its parts
+        df_annotate = self.annotation
+        assert df_annotate is not None
+        size = len(df_annotate)
+
+        if boundaries is None:
+            if N == 1:
+                self.stats = cond_probs(df_annotate)
+                return
+            # Parts with (about) the same number of turns
             parts = size / N
-            for i in range(N):
-                # Get all the rows from parts*i to size*(i+1) with all columns
-                start = int(parts * i)
-                end = int(parts * (i + 1))
-                list_stats.append(cond_probs(df_annotate.iloc[start:end, :]))
-            self.stats = list_stats
+            bounds = [int(parts * i) for i in range(N + 1)]
         else:
-            raise ValueError("N should be between 1 and 4.")
+            if not all(isinstance(bound, (int, np.integer)) for bound in boundaries):
+                raise ValueError("boundaries should be integers.")
+            bounds = [0, *boundaries, size]
+            if any(start > end for start, end in zip(bounds, bounds[1:])):
+                raise ValueError(
+                    "boundaries should be increasing and within the conversation."
+                )
+
+        # The counts of each part are the difference of the running counts at its
+        # boundaries
+        running = _running_counts(df_annotate)
+        self.stats = [
+            _cond_probs_counts(running[end] - running[start])
+            for start, end in zip(bounds, bounds[1:])
+        ]
 
     def show_plot(self, type: str = "Pshift", filename: str | None = None):
         """Shows the frequency treemap plot returned by [`frequency_treemap()`][parshift.plotting.frequency_treemap]
@@ -99,33 +295,40 @@ class Parshift:
         if filename != None and not isinstance(filename, str):
             raise TypeError("Parameter filename must be a String")
 
+        plt = _pyplot()
+        frequencies = self._memoized(
+            ("frequencies", type), lambda: self._frequencies(type)
+        )
+
         if type == "Pshift":
             if isinstance(self.stats, list):
-                _, ax = plt.subplots(
-                    1, len(self.stats), figsize=(5 * len(self.stats), 5)
+                _, axs = plt.subplots(
+                    1, len(self.stats), figsize=(5 * len(self.stats), 5), squeeze=False
                 )
+                ax = axs[0]
 
                 for i in range(len(self.stats)):
-                    frequency_treemap(self.stats[i], type=type, ax=ax[i])
+                    _plot_treemap(frequencies[i], ax=ax[i])
                     ax[i].axis("off")
                     ax[i].set_title(f"n {i+1}")
             else:
-                ax = frequency_treemap(self.stats, type=type)
+                ax = _plot_treemap(frequencies[0])
 
             plt.suptitle("Participation-Shift Frequencies")
 
         elif type == "Pshift_class":
             if isinstance(self.stats, list):
-                _, ax = plt.subplots(
-                    1, len(self.stats), figsize=(5 * len(self.stats), 5)
+                _, axs = plt.subplots(
+                    1, len(self.stats), figsize=(5 * len(self.stats), 5), squeeze=False
                 )
+                ax = axs[0]
 
                 for i in range(len(self.stats)):
-                    frequency_treemap(self.stats[i], type=type, ax=ax[i])
+                    _plot_treemap(frequencies[i], ax=ax[i])
                     ax[i].axis("off")
                     ax[i].set_title(f"n {i+1}")
             else:
-                ax = frequency_treemap(self.stats, type=type)
+                ax = _plot_treemap(frequencies[0])
 
             plt.suptitle("Participation Shifts: Class Proportions")
 
@@ -136,6 +339,11 @@ class Parshift:
 
         plt.show()
 
+    def _frequencies(self, type: str) -> List[pd.Series]:
+        # Frequencies plotted in the treemap of the conversation, or of each part
+        stats_list = self.stats if isinstance(self.stats, list) else [self.stats]
+        return [_frequencies(stats, type) for stats in stats_list if stats is not None]
+
     def show_stats(self, filename: str | None = None):
         """Prints the stats returned by [`cond_probs()`][parshift.statistics.cond_probs]
         Dataframe. If kwarg N (see [`process`][parshift.Parshift.process]) > 1, prints N data frames.
@@ -184,26 +392,136 @@ class Parshift:
                 "Parshift.stats is None. Please run Parshift.process() first."
             )
 
-        if isinstance(self.stats, list):
-            df = propensities(self.stats[0])
-            df.index = ["n1"]  # type: ignore
-            for i in range(1, len(self.stats)):
-                dfx = propensities(self.stats[i])
-                dfx.index = [f"n{i+1}"]  # type: ignore
-                df = pd.concat([df, dfx])
-
-            if filename:
-                if ".csv" not in filename:
-                    filename += ".csv"
-                df.to_csv(filename, index=False)
-            return df
+        df = self._memoized("propensities", self._propensities).copy()
 
-        else:
-            df = propensities(self.stats)
+        if filename:
+            if ".csv" not in filename:
+                filename += ".csv"
+            df.to_csv(filename, index=False)
+        return df
+
+    def _propensities(self) -> pd.DataFrame:
+        # Propensities of the conversation, or of each of its parts
+        stats = self.stats
+        if isinstance(stats, list):
+            df = pd.concat([propensities(part) for part in stats])
+            df.index = [f"n{i+1}" for i in range(len(stats))]  # type: ignore
+        elif stats is not None:
+            df = propensities(stats)
             df.index = ["n"]  # type: ignore
+        return df
 
-            if filename:
-                if ".csv" not in filename:
-                    filename += ".csv"
-                df.to_csv(filename, index=False)
-            return df
+    def get_speaker_profiles(self, filename: str | None = None) -> pd.DataFrame:
+        """Returns a data frame with the participation shift profile of each speaker.
+
+        For each speaker (rows) and role (first column level), either `"initiator"`
+        (the speaker A of the previous turn, e.g. of "AB" in AB-BA) or `"responder"`
+        (the speaker of the turn), the profile has the count of each participation
+        shift code and class, and the propensities, as returned by
+        [`propensities()`][parshift.statistics.propensities], of the participation
+        shifts in which the speaker took that role. Profiles are determined from
+        Parshift.speaker_counts with a single count over speaker, role and code.
+
+        Arguments:
+            filename: Name of the file (csv) to save the profiles data frame. Default to `None`.
+
+        Returns:
+            A Pandas [`DataFrame`][pandas.DataFrame] containing the profiles.
+        """
+
+        speaker_counts = self.speaker_counts
+        if speaker_counts is None:
+            raise ValueError(
+                "Parshift.speaker_counts is None. Please run Parshift.process() "
+                "with interactions=True first."
+            )
+
+        df = self._memoized(
+            "speaker_profiles", lambda: _speaker_profiles(speaker_counts)
+        ).copy()
+
+        if filename:
+            if ".csv" not in filename:
+                filename += ".csv"
+            df.to_csv(filename)
+        return df
+
+    def write_annotation(self, filename: str, format: str = "parquet"):
+        """Write the annotation in a columnar format, from which it can be reloaded
+        with [`load()`][parshift.Parshift.load]. This requires the `pyarrow` package.
+
+        Arguments:
+            filename: Name of the file to save the annotation data frame.
+            format: Format of the file, either `"parquet"` (default) or `"feather"`.
+        """
+
+        if self.annotation is None:
+            raise ValueError(
+                "Parshift.annotation is None. Please run Parshift.process() first."
+            )
+
+        _write_columnar(self.annotation, _with_extension(filename, format), format)
+
+    def write_stats(self, filename: str, format: str = "parquet"):
+        """Write the stats returned by [`cond_probs()`][parshift.statistics.cond_probs]
+        in a columnar format. If kwarg N (see [`process`][parshift.Parshift.process]) > 1,
+        writes N files, as done by [`show_stats()`][parshift.Parshift.show_stats].
+        This requires the `pyarrow` package.
+
+        The `P(S|D,C)` column is written as numbers, with missing values for the
+        turn continuing participation shifts.
+
+        Arguments:
+            filename: Name of the file to save the stats data frame.
+            format: Format of the file, either `"parquet"` (default) or `"feather"`.
+        """
+
+        if self.stats is None:
+            raise ValueError(
+                "Parshift.stats is None. Please run Parshift.process() first."
+            )
+
+        filename = _with_extension(filename, format)
+        stats_list = self.stats if isinstance(self.stats, list) else [self.stats]
+        for i, stats in enumerate(stats_list):
+            stats = stats.assign(
+                **{"P(S|D,C)": pd.to_numeric(stats["P(S|D,C)"].replace("", None))}
+            )
+            if isinstance(self.stats, list):
+                name, ext = filename.rsplit(".", 1)
+                _write_columnar(stats, f"{name}_n{i+1}.{ext}", format)
+            else:
+                _write_columnar(stats, filename, format)
+
+
+# Columnar formats, which are also the respective file extensions
+_formats = ("parquet", "feather")
+
+
+def _check_format(format: str):
+    if format not in _formats:
+        raise ValueError(
+            "Parameter format must be one of the following: `parquet`, `feather`"
+        )
+
+
+def _with_extension(filename: str, format: str) -> str:
+    # Add the extension of the format to the file name, if not there already
+    _check_format(format)
+    if f".{format}" not in filename:
+        filename += f".{format}"
+    return filename
+
+
+def _read_columnar(path: FilePath | ReadBuffer[bytes], format: str) -> pd.DataFrame:
+    _check_format(format)
+    if format == "parquet":
+        return pd.read_parquet(path)
+    return pd.read_feather(path)
+
+
+def _write_columnar(df: pd.DataFrame, filename: str, format: str):
+    if format == "parquet":
+        df.to_parquet(filename, index=False)
+    else:
+        df.reset_index(drop=True).to_feather(filename)
@@ -2,15 +2,42 @@
 # Distributed under the MIT License (See accompanying file LICENSE or copy
 # at http://opensource.org/licenses/MIT)
 
-from typing import Optional
+from __future__ import annotations
+
+from types import ModuleType
+from typing import TYPE_CHECKING, Optional
 
-import matplotlib
-import matplotlib.pyplot as plt
 import pandas as pd
-import squarify
 
 from .annotation import pshift_class
 
+if TYPE_CHECKING:
+    import matplotlib.axes
+
+
+def _pyplot() -> ModuleType:
+    # Matplotlib is only imported when plotting, since it is slow to import and
+    # not required otherwise
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError as err:
+        raise ImportError(_missing_plot_deps) from err
+    return plt
+
+
+def _squarify() -> ModuleType:
+    try:
+        import squarify
+    except ImportError as err:
+        raise ImportError(_missing_plot_deps) from err
+    return squarify
+
+
+_missing_plot_deps = (
+    "Plotting requires the matplotlib and squarify packages, which can be "
+    "installed with `pip install parshift[plot]`"
+)
+
 
 def frequency_treemap(
     cond_probs_df: pd.DataFrame,
@@ -38,11 +65,22 @@ def frequency_treemap(
             "Parameter type must be one of the following: `Pshift`, `Pshift_class`"
         )
 
+    return _plot_treemap(_frequencies(cond_probs_df, type), ax)
+
+
+def _frequencies(cond_probs_df: pd.DataFrame, type: str) -> pd.Series:
+    # Frequencies of each participation shift code or class, as plotted in the
+    # treemap
     if type == "Pshift_class":
-        cond_probs_df["Pshift_class"] = cond_probs_df["Pshift"].apply(pshift_class)
+        classes = pshift_class(cond_probs_df["Pshift"].to_numpy())
+        return cond_probs_df["Frequency"].groupby(classes).sum().rename_axis(type)
+    return cond_probs_df.groupby([type])["Frequency"].sum()
 
-    gb_parshift = cond_probs_df.groupby([type])["Frequency"].sum()
 
+def _plot_treemap(
+    gb_parshift: pd.Series, ax: Optional[matplotlib.axes.Axes] = None
+) -> matplotlib.axes.Axes:
+    # Plot the frequencies of each participation shift code or class in a treemap
     data = [
         el
         for el in list(zip(gb_parshift.values, gb_parshift.index.values))
@@ -75,6 +113,8 @@ def frequency_treemap(
 
     colors = [color_dict[el] for el in list(zip(*data))[1]]
 
+    plt = _pyplot()
+    squarify = _squarify()
     if ax is None:
         _, ax = plt.subplots()
 
@@ -0,0 +1,179 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, TypeVar, cast
+
+import numpy as np
+import pandas as pd
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+# Profile being recorded in the current context, if any
+_current: contextvars.ContextVar[Profile | None] = contextvars.ContextVar(
+    "parshift_profile", default=None
+)
+
+
+class Profile:
+    """Record of the stages of the ParShift pipeline run within
+    [`profile()`][parshift.profiling.profile].
+
+    Each stage is recorded as a dictionary with the following keys:
+
+    - `stage`: Name of the stage (e.g. `"read_ccsv"`).
+    - `level`: Nesting level of the stage, 0 for stages not run within other stages.
+    - `wall_time`: Wall time, in seconds.
+    - `rows_in`: Number of rows of the input data frame, if any.
+    - `rows_out`: Number of rows of the result (e.g. turns or messages).
+    - `peak_memory`: Peak memory allocated during the stage, in bytes, if memory
+      is being measured.
+
+    Arguments:
+        observer: Function called with the record of each stage, as it finishes.
+            Default is `None`.
+        memory: Whether to measure the peak memory of each stage, which slows
+            down the pipeline. Default is `True`.
+    """
+
+    def __init__(
+        self,
+        observer: Callable[[Dict[str, Any]], Any] | None = None,
+        memory: bool = True,
+    ):
+        self.observer = observer
+        self.memory = memory
+        self.records: List[Dict[str, Any]] = []
+        # Peak memory of each running stage, innermost last
+        self._peaks: List[int] = []
+
+    def report(self) -> pd.DataFrame:
+        """Get the records of all stages.
+
+        Returns:
+            A data frame with one row per stage, in the order the stages started.
+        """
+        return pd.DataFrame(
+            self.records,
+            columns=[
+                "stage",
+                "level",
+                "wall_time",
+                "rows_in",
+                "rows_out",
+                "peak_memory",
+            ],
+        )
+
+
+@contextmanager
+def profile(
+    observer: Callable[[Dict[str, Any]], Any] | None = None, memory: bool = True
+) -> Iterator[Profile]:
+    """Record the wall time, rows in and out and peak memory of each stage of the
+    ParShift pipeline run within this context.
+
+    Stages are [`read_ccsv()`][parshift.annotation.read_ccsv],
+    [`conv2turns()`][parshift.annotation.conv2turns],
+    [`annotate()`][parshift.annotation.annotate] (with its `turns` grouping and
+    `pshifts` reply resolution sub-stages) and
+    [`cond_probs()`][parshift.statistics.cond_probs].
+
+    Arguments:
+        observer: Function called with the record of each stage, as it finishes.
+            Default is `None`.
+        memory: Whether to measure the peak memory of each stage. Default is `True`.
+
+    Returns:
+        The [`Profile`][parshift.profiling.Profile] where stages are recorded.
+    """
+
+    recording = Profile(observer, memory)
+    token = _current.set(recording)
+    try:
+        yield recording
+    finally:
+        _current.reset(token)
+
+
+def _rows(obj: Any) -> int | None:
+    # Number of rows of a stage's input or result
+    if isinstance(obj, tuple):
+        return _rows(obj[0]) if obj else None
+    if isinstance(obj, (pd.DataFrame, pd.Series, np.ndarray, list)):
+        return len(obj)
+    return None
+
+
+def _profiled(stage: str) -> Callable[[_F], _F]:
+    # Decorator recording a function as a stage of the current profile, if any
+    def decorator(function: _F) -> _F:
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            recording = _current.get()
+            if recording is None:
+                return function(*args, **kwargs)
+            return _run_stage(recording, stage, function, args, kwargs)
+
+        return cast(_F, wrapper)
+
+    return decorator
+
+
+def _run_stage(
+    recording: Profile,
+    stage: str,
+    function: Callable[..., Any],
+    args: tuple,
+    kwargs: Dict[str, Any],
+) -> Any:
+    # Run a function as a stage of a profile
+    record: Dict[str, Any] = {
+        "stage": stage,
+        "level": len(recording._peaks),
+        "wall_time": None,
+        "rows_in": _rows(args[0]) if args else None,
+        "rows_out": None,
+        "peak_memory": None,
+    }
+    recording.records.append(record)
+
+    # The peak memory is reset for each stage, so the peak of the enclosing stage
+    # up to this point is kept separately
+    started = False
+    if recording.memory:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started = True
+        elif recording._peaks:
+            peak = tracemalloc.get_traced_memory()[1]
+            recording._peaks[-1] = max(recording._peaks[-1], peak)
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+    recording._peaks.append(0)
+
+    start = time.perf_counter()
+    try:
+        result = function(*args, **kwargs)
+    finally:
+        record["wall_time"] = time.perf_counter() - start
+        peak = recording._peaks.pop()
+        if recording.memory:
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            record["peak_memory"] = peak - start_memory
+            if recording._peaks:
+                recording._peaks[-1] = max(recording._peaks[-1], peak)
+            if started:
+                tracemalloc.stop()
+
+    record["rows_out"] = _rows(result)
+    if recording.observer is not None:
+        recording.observer(record)
+    return result
@@ -2,133 +2,184 @@
 # Distributed under the MIT License (See accompanying file LICENSE or copy
 # at http://opensource.org/licenses/MIT)
 
+from __future__ import annotations
+
+from typing import Any, Tuple
+
+import numpy as np
 import pandas as pd
 
-_cp_order = {
-    "AB-BA": 4,
-    "AB-B0": 5,
-    "AB-BY": 10,
-    "A0-X0": 1,
-    "A0-XA": 0,
-    "A0-XY": 2,
-    "AB-X0": 6,
-    "AB-XA": 7,
-    "AB-XB": 8,
-    "AB-XY": 11,
-    "A0-AY": 3,
-    "AB-A0": 9,
-    "AB-AY": 12,
-}
-
-
-def _change_of_speaker(ps):
-    _change_of_speaker_dic = {
-        "AB-BA": True,
-        "AB-B0": True,
-        "AB-BY": True,
-        "A0-X0": True,
-        "A0-XA": True,
-        "A0-XY": True,
-        "AB-X0": True,
-        "AB-XA": True,
-        "AB-XB": True,
-        "AB-XY": True,
-        "A0-AY": False,
-        "AB-A0": False,
-        "AB-AY": False,
-    }
-    return _change_of_speaker_dic[ps]
-
-
-def _targeted_remark(ps):
-    _targeted_remark_dic = {
-        "AB-BA": True,
-        "AB-B0": True,
-        "AB-BY": True,
-        "A0-X0": False,
-        "A0-XA": False,
-        "A0-XY": False,
-        "AB-X0": True,
-        "AB-XA": True,
-        "AB-XB": True,
-        "AB-XY": True,
-        "A0-AY": False,
-        "AB-A0": True,
-        "AB-AY": True,
-    }
-    return _targeted_remark_dic[ps]
-
-
-def _frequency_table(parshift_annotation_df) -> list:
-    """
-    This function takes in a data frame of ParShift annotations and returns a frequency table of ParShift codes.
+from .annotation import _pshift_classes, _pshift_codes, _pshift_table
+from .profiling import _profiled
+
+# Masks of the participation shift codes starting with "A0" and of the turn
+# continuing ones, in the order of `_pshift_codes`
+_a0_mask = ~_pshift_table["D"].to_numpy()
+_continuing_mask = ~_pshift_table["C"].to_numpy()
+
+# Columns of the participation shift codes, in the order of `_pshift_codes`, at
+# each position of the `cond_probs()` data frame
+_cp_columns = np.argsort(_pshift_table["cp_order"].to_numpy())
+
+
+def _pshift_counts(parshift_annotation_df: pd.DataFrame) -> np.ndarray:
+    # Number of occurrences of each participation shift code, in the order of
+    # `_pshift_codes`, obtained with a single pass over the pshift column
+    counts = parshift_annotation_df["pshift"].value_counts(sort=False)
+    return counts.reindex(_pshift_codes, fill_value=0).to_numpy(dtype=np.int64)
+
+
+def _grouped_pshift_counts(
+    parshift_annotation_df: pd.DataFrame, group_by: str
+) -> pd.DataFrame:
+    # Number of occurrences of each participation shift code (columns, in the order
+    # of `_pshift_codes`) for each conversation (rows, in order of appearance),
+    # obtained with a single count over conversation and code
+    codes = pd.Categorical(parshift_annotation_df["pshift"], categories=_pshift_codes)
+    groups, keys = pd.factorize(parshift_annotation_df[group_by])
+    valid = (codes.codes >= 0) & (groups >= 0)
+    counts = np.bincount(
+        groups[valid] * len(_pshift_codes) + codes.codes[valid],
+        minlength=len(keys) * len(_pshift_codes),
+    )
+    return pd.DataFrame(
+        counts.reshape(len(keys), len(_pshift_codes)),
+        index=pd.Index(keys, name=group_by),
+        columns=_pshift_codes,
+    )
+
+
+def _running_counts(parshift_annotation_df: pd.DataFrame) -> np.ndarray:
+    # Running totals of the counts of each participation shift code (columns, in the
+    # order of `_pshift_codes`) up to each turn, with a row of zeros before the first
+    # turn, so that the counts of turns `i` to `j - 1` are given by the difference of
+    # rows `j` and `i`
+    codes = pd.Categorical(
+        parshift_annotation_df["pshift"], categories=_pshift_codes
+    ).codes
+    running = np.zeros((len(codes) + 1, len(_pshift_codes)), dtype=np.int64)
+    valid = codes >= 0
+    running[1:][np.flatnonzero(valid), codes[valid]] = 1
+    return np.cumsum(running, axis=0, out=running)
+
+
+def pshift_counts(
+    pshift_codes: pd.DataFrame | None = None, group_by: str | None = None
+) -> pd.Series | pd.DataFrame:
+    """Count the occurrences of each participation shift code.
+
+    The resulting frequency table can be updated with the counts of further
+    annotations (e.g. with [`annotate_chunks()`][parshift.streaming.annotate_chunks])
+    and passed to [`cond_probs()`][parshift.statistics.cond_probs] instead of an
+    annotation.
 
     Arguments:
-        parshift_annotation_df: A Pandas data frame containing ParShift annotations
+        pshift_codes: A sequence of participation shift code obtained with
+            [`annotate()`][parshift.annotation.annotate]. If `None` (default), a
+            frequency table with all counts set to zero is returned.
+        group_by: Column identifying the conversation of each turn, if
+            `pshift_codes` contains several conversations (e.g. as annotated by
+            [`annotate()`][parshift.annotation.annotate] with `group_by`). Default
+            is `None` (a single conversation).
 
     Returns:
-        A list containing a dictionary of ParShift codes and their frequencies,
-        the total number of times a ParShift code starting with "A0" appears,
-        the total number of times a Parshift code starting with "AB" appears,
-        the total number of times a Parshift code with "A0" assuming change of speaker,
-        and the total number of times a ParShift code with "AB" appears assuming
-        change of speaker.
+        A series with the number of occurrences of each participation shift code.
+            If `group_by` is given, a data frame with one row per conversation (in
+            order of appearance) and one column per participation shift code, which
+            can be passed to [`batch_stats()`][parshift.statistics.batch_stats].
     """
 
-    parshift_codes = [
-        "AB-BA",
-        "AB-B0",
-        "AB-BY",
-        "A0-X0",
-        "A0-XA",
-        "A0-XY",
-        "AB-X0",
-        "AB-XA",
-        "AB-XB",
-        "AB-XY",
-        "A0-AY",
-        "AB-A0",
-        "AB-AY",
-    ]
+    if group_by is not None:
+        if not isinstance(pshift_codes, pd.DataFrame):
+            raise TypeError("Parameter pshift_codes must be a Dataframe")
+        return _grouped_pshift_counts(pshift_codes, group_by)
+    if pshift_codes is None:
+        counts = np.zeros(len(_pshift_codes), dtype=np.int64)
+    elif isinstance(pshift_codes, pd.DataFrame):
+        counts = _pshift_counts(pshift_codes)
+    else:
+        raise TypeError("Parameter pshift_codes must be a Dataframe")
+
+    return pd.Series(counts, index=pd.Index(_pshift_codes, name="pshift"))
+
+
+def _round(values: np.ndarray) -> np.ndarray:
+    # Round to two decimal places as Python's round(), which is correctly rounded.
+    # NumPy scales values by 100 before rounding them, so it only differs from
+    # round() for values close to a tie, which are rounded with round() instead
+    rounded = np.round(values, 2)
+    scaled = values * 100
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(value, 2) for value in values[near_tie].tolist()]
+    return rounded
+
+
+def _cond_probs_matrix(
+    counts: np.ndarray, rounded: bool = True
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Probability, P(S|D) and P(S|D,C) for each row of a matrix of participation
+    # shift counts (columns in the order of `_pshift_codes`), where P(S|D,C) of
+    # turn continuing codes is NaN. Probabilities are rounded to two decimal places
+    # as in `cond_probs()`, unless `rounded` is False
+    a0, change = _a0_mask, ~_continuing_mask
+
+    # Totals of the subgroup (A0- or AB-) each code belongs to, with and without
+    # assuming change of speaker
+    totals = np.where(
+        a0,
+        counts[:, a0].sum(axis=1, keepdims=True),
+        counts[:, ~a0].sum(axis=1, keepdims=True),
+    )
+    totals_change = np.where(
+        a0,
+        counts[:, a0 & change].sum(axis=1, keepdims=True),
+        counts[:, ~a0 & change].sum(axis=1, keepdims=True),
+    )
 
-    dict_prob_empirical_count = {}
-    count_start_A0_total = 0
-    count_start_AB_total = 0
-    count_not_turn_continuing_A0 = 0
-    count_not_turn_continuing_AB = 0
-
-    for code in parshift_codes:
-        count = 0
-        for _, row in parshift_annotation_df.iterrows():
-            if row["pshift"] == code:
-                count += 1
-
-        dict_prob_empirical_count[code] = count
-
-        if code.split("-")[0] == "A0":
-            count_start_A0_total += count
-            if code not in ["A0-AY", "AB-A0", "AB-AY", "A0-A0"]:
-                count_not_turn_continuing_A0 += count
-        else:
-            count_start_AB_total += count
-            if code not in ["A0-AY", "AB-A0", "AB-AY", "A0-A0"]:
-                count_not_turn_continuing_AB += count
-
-    return [
-        dict_prob_empirical_count,
-        count_start_A0_total,
-        count_start_AB_total,
-        count_not_turn_continuing_A0,
-        count_not_turn_continuing_AB,
-    ]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cp = np.where(totals != 0, counts / totals, 0)
+        cpetc = np.where(totals_change != 0, counts / totals_change, 0)
+        probability = counts / counts.sum(axis=1, keepdims=True)
+    if rounded:
+        cp, cpetc = _round(cp), _round(cpetc)
+        probability = np.round(probability, 2)
+
+    # P(S|D,C) is not defined for turn continuing codes
+    cpetc[:, ~change] = np.nan
+
+    return probability, cp, cpetc
+
+
+def _cond_probs_counts(counts: np.ndarray) -> pd.DataFrame:
+    # Conditional probabilities table from the participation shift counts
+    probability, cp, cpetc = _cond_probs_matrix(counts[np.newaxis])
+
+    # Columns are built directly in the `cp_order` of the code table, with the C and D
+    # attributes of each code taken from the code table
+    order = _cp_columns
+    return pd.DataFrame(
+        {
+            "Pshift": _pshift_table.index.to_numpy(dtype=object)[order],
+            "Frequency": counts[order],
+            "Probability": probability[0, order],
+            "P(S|D)": cp[0, order],
+            "P(S|D,C)": np.where(_continuing_mask, "", cpetc[0].astype(object))[order],
+            "Change of Speaker (C)": _pshift_table["C"].to_numpy()[order],
+            "Directed Remark (D)": _pshift_table["D"].to_numpy()[order],
+        }
+    )
 
 
-def cond_probs(pshift_codes: pd.DataFrame) -> pd.DataFrame:
+@_profiled("cond_probs")
+def cond_probs(pshift_codes: pd.DataFrame | pd.Series) -> pd.DataFrame:
     """Determine the conditional probabilities for a sequence of participation shift codes.
 
     Arguments:
         pshift_codes: A sequence of participation shift code obtained with
-            [`annotate()`][parshift.annotation.annotate].
+            [`annotate()`][parshift.annotation.annotate], or the frequency table of
+            such a sequence, as returned by
+            [`pshift_counts()`][parshift.statistics.pshift_counts].
 
     Returns:
         A data frame containing the frequency, probability and conditional probabilities
@@ -142,91 +193,13 @@ def cond_probs(pshift_codes: pd.DataFrame) -> pd.DataFrame:
             in each subgroup, for each participation shift where the change of speaker occurs.
     """
 
-    if not isinstance(pshift_codes, pd.DataFrame):
+    if isinstance(pshift_codes, pd.Series):
+        counts = pshift_codes.reindex(_pshift_codes, fill_value=0)
+        return _cond_probs_counts(counts.to_numpy(dtype=np.int64))
+    elif not isinstance(pshift_codes, pd.DataFrame):
         raise TypeError("Parameter parshift_annotation_df must be a Dataframe")
 
-    frequency_table_and_counts = _frequency_table(pshift_codes)
-    freq_table = frequency_table_and_counts[0]
-
-    cond_prob = {}
-    for key in freq_table:
-        if key.split("-")[0] == "A0":
-            if key not in ["A0-AY", "AB-A0", "AB-AY", "A0-A0"]:
-                cond_prob[key] = {
-                    "CP": (
-                        round(freq_table[key] / frequency_table_and_counts[1], 2)
-                        if frequency_table_and_counts[1] != 0
-                        else 0
-                    ),
-                    "CPeTC": (
-                        round(freq_table[key] / frequency_table_and_counts[3], 2)
-                        if frequency_table_and_counts[3] != 0
-                        else 0
-                    ),
-                }
-            else:
-                cond_prob[key] = {
-                    "CP": (
-                        round(freq_table[key] / frequency_table_and_counts[1], 2)
-                        if frequency_table_and_counts[1] != 0
-                        else 0
-                    ),
-                    "CPeTC": "",
-                }
-        else:
-            if key not in ["A0-AY", "AB-A0", "AB-AY", "A0-A0"]:
-                cond_prob[key] = {
-                    "CP": (
-                        round(freq_table[key] / frequency_table_and_counts[2], 2)
-                        if frequency_table_and_counts[2] != 0
-                        else 0
-                    ),
-                    "CPeTC": (
-                        round(freq_table[key] / frequency_table_and_counts[4], 2)
-                        if frequency_table_and_counts[4] != 0
-                        else 0
-                    ),
-                }
-            else:
-                cond_prob[key] = {
-                    "CP": (
-                        round(freq_table[key] / frequency_table_and_counts[2], 2)
-                        if frequency_table_and_counts[2] != 0
-                        else 0
-                    ),
-                    "CPeTC": "",
-                }
-
-    cond_prob_df = pd.DataFrame.from_dict(cond_prob, orient="index")
-    freq = pd.DataFrame.from_dict(freq_table, orient="index", columns=["Frequency"])
-    freq["Probability"] = round(freq["Frequency"] / freq["Frequency"].sum(), 2)
-
-    result = (
-        pd.concat([freq, cond_prob_df], axis=1)
-        .reset_index()
-        .rename(columns={"index": "pshift"})
-    )
-
-    result = result.sort_values(
-        by=["pshift"], key=lambda x: x.map(_cp_order)
-    ).reset_index(drop=True)
-
-    result = result.iloc[:, [0, 1, 2, 3, 4]]
-
-    result["Change of Speaker (C)"] = result["pshift"].apply(
-        lambda ps: _change_of_speaker(ps)
-    )
-
-    result["Directed Remark (D)"] = result["pshift"].apply(
-        lambda ps: _targeted_remark(ps)
-    )
-
-    result.rename(
-        columns={"pshift": "Pshift", "CP": "P(S|D)", "CPeTC": "P(S|D,C)"},
-        inplace=True,
-    )
-
-    return result
+    return _cond_probs_counts(_pshift_counts(pshift_codes))
 
 
 def propensities(cond_probs_df: pd.DataFrame) -> pd.DataFrame:
@@ -255,3 +228,206 @@ def propensities(cond_probs_df: pd.DataFrame) -> pd.DataFrame:
     dic_propensities["termination"] = p_s_d[2] + p_s_d[9] + p_s_d[12]
 
     return pd.DataFrame([dic_propensities])
+
+
+def _propensities_matrix(cp: np.ndarray, cpetc: np.ndarray) -> pd.DataFrame:
+    # Propensities for each row of P(S|D) and P(S|D,C) matrices, summed in the
+    # same positions (and order) as in `propensities()`
+    p_s_d, p_s_d_c = cp[:, _cp_columns], cpetc[:, _cp_columns]
+    return pd.DataFrame(
+        {
+            "turn-receiving": p_s_d[:, 4] + p_s_d[:, 5] + p_s_d[:, 10],
+            "targeting": p_s_d_c[:, 2] + p_s_d_c[:, 10] + p_s_d_c[:, 11],
+            "termination": p_s_d[:, 2] + p_s_d[:, 9] + p_s_d[:, 12],
+        }
+    )
+
+
+def _speaker_profiles(speaker_counts: pd.DataFrame) -> pd.DataFrame:
+    # Counts of each participation shift code and class, and propensities, of each
+    # speaker (rows) in each role (first column level), from the counts by speaker,
+    # role and code returned by `annotate()` with `interactions`. The statistics of
+    # all speakers are determined at once, as in `batch_stats()`.
+    classes = np.eye(len(_pshift_classes), dtype=np.int64)[
+        _pshift_table["class"].cat.codes.to_numpy()
+    ]
+    roles = list(speaker_counts.columns.unique("role"))
+    columns = pd.MultiIndex.from_product([roles, _pshift_codes])
+    all_counts = speaker_counts.reindex(columns=columns, fill_value=0).to_numpy(
+        dtype=np.int64
+    )
+
+    profiles = {}
+    for i, role in enumerate(roles):
+        counts = all_counts[:, i * len(_pshift_codes) : (i + 1) * len(_pshift_codes)]
+        _, cp, cpetc = _cond_probs_matrix(counts)
+        profiles[role] = pd.concat(
+            [
+                pd.DataFrame(counts, columns=_pshift_codes),
+                pd.DataFrame(counts @ classes, columns=_pshift_classes),
+                _propensities_matrix(cp, cpetc),
+            ],
+            axis=1,
+        )
+
+    result = pd.concat(profiles, axis=1, names=["role", None])
+    result.index = speaker_counts.index
+    return result
+
+
+def rolling_stats(
+    pshift_codes: pd.DataFrame,
+    window: Any,
+    times: Any = None,
+    step: int = 1,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Determine the conditional probabilities and propensities over a sliding window.
+
+    The participation shift counts of each window are obtained from the running
+    totals of the counts of each code, i.e. by adding the turns entering the window
+    and removing the ones leaving it, so that all windows are determined in a single
+    pass over the annotation.
+
+    Arguments:
+        pshift_codes: A sequence of participation shift code obtained with
+            [`annotate()`][parshift.annotation.annotate].
+        window: Size of the window. If `times` is `None`, the number of turns in
+            each window (the last `window` turns, including the current one).
+            Otherwise, the length of time covered by each window (e.g. `"30min"`
+            for datetimes), such that turns within `window` of the current one
+            are included.
+        times: The time of each turn (e.g. of its first message), in
+            non-decreasing order. Default is `None`, in which case windows are
+            defined by number of turns.
+        step: Determine the statistics of every `step` turns only. Default is 1.
+
+    Returns:
+        A tuple with two data frames, indexed by the turn ending each window (or its
+            time, if `times` is given): the statistics, with a column for each
+            column of [`cond_probs()`][parshift.statistics.cond_probs] and
+            participation shift code (`P(S|D,C)` of turn continuing codes is NaN);
+            and the propensities, as returned by
+            [`propensities()`][parshift.statistics.propensities].
+    """
+
+    if not isinstance(pshift_codes, pd.DataFrame):
+        raise TypeError("Parameter pshift_codes must be a Dataframe")
+    if not isinstance(step, int) or step < 1:
+        raise ValueError("Parameter step must be a positive integer")
+
+    n = len(pshift_codes)
+    ends = np.arange(n)
+    if times is None:
+        if not isinstance(window, int) or window < 1:
+            raise ValueError("Parameter window must be a positive integer")
+        starts = np.maximum(ends + 1 - window, 0)
+        index = pshift_codes.index
+    else:
+        times = pd.Series(times)
+        if len(times) != n:
+            raise ValueError("Parameter times must have one element per turn")
+        if not times.is_monotonic_increasing:
+            raise ValueError("Parameter times must be in non-decreasing order")
+        if pd.api.types.is_datetime64_any_dtype(times):
+            window = pd.Timedelta(window)
+        t = times.to_numpy()
+        starts = np.searchsorted(t, t - window, side="right")
+        index = pd.Index(times)
+
+    running = _running_counts(pshift_codes)
+    ends, starts = ends[::step], starts[::step]
+    counts = running[ends + 1] - running[starts]
+    probability, cp, cpetc = _cond_probs_matrix(counts)
+
+    # Statistics with columns in the order of `cond_probs()`
+    columns = [_pshift_codes[col] for col in _cp_columns]
+    stats = pd.concat(
+        {
+            name: pd.DataFrame(values[:, _cp_columns], columns=columns)
+            for name, values in [
+                ("Frequency", counts),
+                ("Probability", probability),
+                ("P(S|D)", cp),
+                ("P(S|D,C)", cpetc),
+            ]
+        },
+        axis=1,
+    )
+    stats.index = index[::step]
+
+    props = _propensities_matrix(cp, cpetc)
+    props.index = stats.index
+
+    return stats, props
+
+
+def batch_stats(
+    pshift_codes: pd.DataFrame, group_by: str | None = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Determine the conditional probabilities and propensities of many
+    conversations at once.
+
+    The statistics of all conversations are determined together from a matrix with
+    the participation shift counts of each conversation, which avoids the overhead
+    of calling [`cond_probs()`][parshift.statistics.cond_probs] and
+    [`propensities()`][parshift.statistics.propensities] for each one.
+
+    Arguments:
+        pshift_codes: The participation shift counts of each conversation, as a
+            data frame with one row per conversation and one column per
+            participation shift code, labelled by its code (as returned by
+            [`pshift_counts()`][parshift.statistics.pshift_counts] with `group_by`,
+            where missing codes count as zero). If `group_by` is given, an
+            annotation of several conversations instead, as returned by
+            [`annotate()`][parshift.annotation.annotate] with `group_by`.
+        group_by: Column identifying the conversation of each turn, if
+            `pshift_codes` is an annotation. Default is `None`.
+
+    Returns:
+        A tuple with two data frames: the statistics, with one row per conversation
+            and participation shift code (in the order of
+            [`cond_probs()`][parshift.statistics.cond_probs]) and its `Frequency`,
+            `Probability`, `P(S|D)` and `P(S|D,C)` columns (`P(S|D,C)` of turn
+            continuing codes is NaN); and the propensities, as returned by
+            [`propensities()`][parshift.statistics.propensities], with one row per
+            conversation. Conversations are identified by the `group_by` values
+            or the index of the counts data frame.
+    """
+
+    if not isinstance(pshift_codes, pd.DataFrame):
+        raise TypeError("Parameter pshift_codes must be a Dataframe")
+    if group_by is not None:
+        counts_df = _grouped_pshift_counts(pshift_codes, group_by)
+    elif set(pshift_codes.columns) <= set(_pshift_codes):
+        counts_df = pshift_codes.reindex(columns=_pshift_codes, fill_value=0)
+    else:
+        raise ValueError(
+            "Parameter pshift_codes must only have participation shift columns"
+        )
+
+    counts = counts_df.to_numpy(dtype=np.int64)
+    probability, cp, cpetc = _cond_probs_matrix(counts)
+
+    # One row per conversation and code, in the order of `cond_probs()`
+    keys = counts_df.index.rename(counts_df.index.name or "conversation")
+    index = pd.MultiIndex.from_product(
+        [keys, [_pshift_codes[col] for col in _cp_columns]],
+        names=[keys.name, "Pshift"],
+    )
+    stats = pd.DataFrame(
+        {
+            name: values[:, _cp_columns].ravel()
+            for name, values in [
+                ("Frequency", counts),
+                ("Probability", probability),
+                ("P(S|D)", cp),
+                ("P(S|D,C)", cpetc),
+            ]
+        },
+        index=index,
+    )
+
+    props = _propensities_matrix(cp, cpetc)
+    props.index = keys
+
+    return stats, props
@@ -0,0 +1,376 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from pandas._typing import FilePath, ReadCsvBuffer
+
+from .annotation import (
+    _GROUP,
+    _annotation_frame,
+    _csv_dtypes,
+    _pshift_codes,
+    _pshift_kernel,
+    _pshift_label_codes,
+    _pshift_labels,
+    _reply_labels,
+    _target_labels,
+    _turns,
+    _validate,
+)
+from .statistics import _cond_probs_counts, _pshift_counts, propensities
+
+
+class _History:
+    # State carried between chunks of a conversation: the speaker codes, the
+    # turn of each utterance_id and, for each turn, its speaker, whether it is a
+    # reply and the utterance_id it replies to
+
+    def __init__(self):
+        self.n_turns = 0
+        self.speakers: Dict[str, int] = {}
+        self.turn_of: Dict[int, int] = {}
+        self.spk = np.empty(0, dtype=np.int64)
+        self.has_target = np.empty(0, dtype=bool)
+        self.reply = np.empty(0, dtype=np.int64)
+        self.last_label: Tuple[int, int] = (_GROUP, _GROUP)
+
+    def codes(self, names: np.ndarray) -> np.ndarray:
+        # Integer codes of speakers, consistent across chunks
+        local, uniques = pd.factorize(names)
+        known = [self.speakers.setdefault(name, len(self.speakers)) for name in uniques]
+        return np.array(known, dtype=np.int64)[local]
+
+    def lookup(self, utterance_ids: np.ndarray) -> np.ndarray:
+        # Turn of each utterance_id, or -1 if unknown
+        turn_of = self.turn_of
+        return np.array(
+            [turn_of.get(uid, -1) for uid in utterance_ids.tolist()], dtype=np.int64
+        )
+
+    def append(self, spk: np.ndarray, has_target: np.ndarray, reply: np.ndarray):
+        # Append turns to the per-turn arrays, whose capacity grows geometrically
+        end = self.n_turns + len(spk)
+        if end > len(self.spk):
+            capacity = max(end, 2 * len(self.spk))
+            self.spk = np.resize(self.spk, capacity)
+            self.has_target = np.resize(self.has_target, capacity)
+            self.reply = np.resize(self.reply, capacity)
+        self.spk[self.n_turns : end] = spk
+        self.has_target[self.n_turns : end] = has_target
+        self.reply[self.n_turns : end] = reply
+        self.n_turns = end
+
+    def annotate(self, turns_df: pd.DataFrame, turn_index: pd.Series) -> pd.DataFrame:
+        # Annotate the next turns of the conversation
+        m = len(turns_df)
+        base = self.n_turns
+        idx = base + np.arange(m)
+        last_col = str(turns_df.columns[-1])
+        spk = self.codes(turns_df["speaker_id"].astype(str).to_numpy())
+        targets = turns_df[last_col]
+        has_target = targets.notna().to_numpy()
+        first = np.zeros(m, dtype=bool)
+        first[:1] = base == 0
+
+        if last_col == "reply_to_id":
+            reply = targets.fillna(0).to_numpy(dtype=np.int64)
+            self.append(spk, has_target, reply)
+            turns = turn_index[turn_index < m]
+            self.turn_of.update(zip(turns.index.tolist(), (turns + base).tolist()))
+
+            # turn being replied to, and the turn which that one replies to
+            ref = np.full(m, -1)
+            ref[has_target] = self.lookup(reply[has_target])
+            j = np.maximum(ref, 0)
+            chain = (ref >= 0) & self.has_target[j]
+            ref2 = np.full(m, -1)
+            ref2[chain] = self.lookup(self.reply[j[chain]])
+
+            a, b, c, d = _reply_labels(
+                spk,
+                idx,
+                has_target,
+                ref,
+                self.spk[j],
+                self.has_target[j],
+                ref2,
+                self.spk[np.maximum(ref2, 0)],
+                first,
+                self.last_label,
+            )
+
+        else:
+            tgt = np.full(m, _GROUP)
+            tgt[has_target] = self.codes(
+                targets[has_target].astype(str).to_numpy(dtype=object)
+            )
+            self.n_turns += m
+            a, b, c, d = _target_labels(spk, tgt, self.last_label)
+
+        if m > 0:
+            self.last_label = (int(c[-1]), int(d[-1]))
+
+        pshifts = _pshift_kernel(a, b, c, d)
+        pshifts[first] = -1
+
+        annotation = _annotation_frame(turns_df, pshifts)
+        annotation.index = pd.RangeIndex(base, base + m)
+        return annotation
+
+
+def annotate_chunks(
+    filepath_or_buffer: FilePath | ReadCsvBuffer[bytes] | ReadCsvBuffer[str],
+    chunksize: int = 100000,
+    counts: pd.Series | None = None,
+    **kwargs: Any,
+) -> Iterator[pd.DataFrame]:
+    """Read a conversation file in CSV format in chunks and annotate it incrementally.
+
+    This function is equivalent to reading the conversation with
+    [`read_ccsv()`][parshift.annotation.read_ccsv] and annotating it with
+    [`annotate()`][parshift.annotation.annotate], but only one chunk of the
+    conversation is kept in memory at a time. The last turn of each chunk is
+    annotated with the next chunk, since it may continue there, while the turn of
+    each utterance_id is remembered so that replies to previous chunks can be
+    resolved.
+
+    Arguments:
+        filepath_or_buffer: Any valid string path to CSV file, as accepted by
+            Pandas [`read_csv()`][pandas.read_csv] function.
+        chunksize: Number of messages read at a time. Default is 100000.
+        counts: A frequency table, as returned by
+            [`pshift_counts()`][parshift.statistics.pshift_counts], which is updated
+            in place with the participation shift codes of each annotated chunk,
+            so that [`cond_probs()`][parshift.statistics.cond_probs] can be
+            determined without the full annotation. Default is `None`.
+        **kwargs: Keyword parameters passed to Pandas
+            [`read_csv()`][pandas.read_csv] function.
+
+    Returns:
+        An iterator over data frames with the participation shift codes of
+            consecutive turns, as returned by
+            [`annotate()`][parshift.annotation.annotate].
+    """
+
+    history = _History()
+    pending: pd.DataFrame | None = None
+    reader = pd.read_csv(
+        filepath_or_buffer, dtype=_csv_dtypes, chunksize=chunksize, **kwargs  # type: ignore
+    )
+
+    def annotate_turns(turns_df: pd.DataFrame, turn_index: pd.Series) -> pd.DataFrame:
+        annotation = history.annotate(turns_df, turn_index)
+        if counts is not None:
+            counts.iloc[:] = counts.to_numpy() + _pshift_counts(annotation)
+        return annotation
+
+    with reader:
+        for chunk in reader:
+            chunk = _validate(chunk)
+            if pending is not None:
+                chunk = pd.concat([pending, chunk], ignore_index=True)
+            turns_df, turn_index = _turns(chunk)
+            if len(turns_df) == 0:
+                continue
+
+            # The last turn may continue in the next chunk, so it is kept for later
+            n_last = len(turns_df["utterance_ids"].iloc[-1])
+            pending = chunk.iloc[len(chunk) - n_last :]
+            if len(turns_df) > 1:
+                yield annotate_turns(turns_df.iloc[:-1], turn_index)
+
+    if pending is not None:
+        yield annotate_turns(*_turns(pending))
+
+
+def _as_id(value: Any) -> int | None:
+    # Convert a single `reply_to_id`/`target_id` value into an integer, treating
+    # missing values (`None`, NaN, `pd.NA`), empty strings and "None" as missing
+    if isinstance(value, str) and value in ("", "None"):
+        return None
+    if pd.isna(value):
+        return None
+    return int(float(value))
+
+
+class OnlineAnnotator:
+    """Annotate a conversation incrementally, one message at a time.
+
+    Messages are merged into the open turn or start a new one, whose participation
+    shift code is determined at once from the turns seen so far. Only the state
+    required to resolve replies (speaker, target and utterance_ids of each turn) is
+    kept, together with the running frequency table of participation shift codes,
+    so that statistics can be obtained at any moment without recomputation.
+
+    Codes are the ones of [`annotate()`][parshift.annotation.annotate], except for
+    turns whose first message replies to a later message of the same turn (e.g.
+    messages 4 and 5 of the same speaker, both replying to message 5).
+    [`annotate()`][parshift.annotation.annotate] resolves such replies against the
+    finished turn, whereas here the code is determined when the turn starts, while
+    the message being replied to is still unknown.
+
+    Arguments:
+        target_col: Either `"reply_to_id"` (default), if messages reply to other
+            messages, or `"target_id"`, if messages are addressed to speakers.
+    """
+
+    def __init__(self, target_col: str = "reply_to_id"):
+        if target_col not in ("reply_to_id", "target_id"):
+            raise ValueError(
+                "Parameter target_col must be either `reply_to_id` or `target_id`"
+            )
+
+        self.target_col = target_col
+        self._speakers: Dict[str, int] = {}
+        self._turn_of: Dict[int, int] = {}
+        self._spk: List[int] = []
+        self._reply: List[int | None] = []
+        self._last_label: Tuple[int, int] = (_GROUP, _GROUP)
+        self._counts = np.zeros(len(_pshift_codes), dtype=np.int64)
+        self._open: Dict[str, Any] | None = None
+
+    @property
+    def n_turns(self) -> int:
+        """Number of turns seen so far, including the open one."""
+        return len(self._spk)
+
+    @property
+    def open_turn(self) -> Dict[str, Any] | None:
+        """The open turn, as a dictionary with the same keys as the turns returned by
+        [`conv2turns()`][parshift.annotation.conv2turns] plus its `"pshift"` code,
+        or `None` if no message has been added yet."""
+        if self._open is None:
+            return None
+        turn = dict(self._open)
+        turn["utterance_ids"] = list(turn["utterance_ids"])
+        turn["utterance"] = ". ".join(str(text) for text in turn["utterance"])
+        return turn
+
+    def counts(self) -> pd.Series:
+        """Get the running frequency table of participation shift codes.
+
+        Returns:
+            A series with the number of occurrences of each participation shift code,
+                as returned by [`pshift_counts()`][parshift.statistics.pshift_counts].
+        """
+        return pd.Series(
+            self._counts.copy(), index=pd.Index(_pshift_codes, name="pshift")
+        )
+
+    def cond_probs(self) -> pd.DataFrame:
+        """Determine the conditional probabilities of the turns seen so far.
+
+        Returns:
+            A data frame as returned by [`cond_probs()`][parshift.statistics.cond_probs].
+        """
+        return _cond_probs_counts(self._counts)
+
+    def propensities(self) -> pd.DataFrame:
+        """Determine the propensities of the turns seen so far.
+
+        Returns:
+            A data frame as returned by
+                [`propensities()`][parshift.statistics.propensities].
+        """
+        return propensities(self.cond_probs())
+
+    def add(
+        self,
+        utterance_id: int,
+        speaker_id: Any,
+        utterance: str = "",
+        target: Any = None,
+    ) -> str | None:
+        """Add a message to the conversation.
+
+        Arguments:
+            utterance_id: ID of the message.
+            speaker_id: ID of the user sending the message.
+            utterance: The message itself.
+            target: The ID of the message being replied to or of the user the message
+                is addressed to, depending on `target_col`. Missing values
+                (`None`, NaN, `pd.NA`), empty strings and `"None"` mean the message
+                is addressed to the group.
+
+        Returns:
+            The participation shift code of the new turn, if the message starts one
+                (an empty string for the first turn, as in
+                [`annotate()`][parshift.annotation.annotate]), or `None` if the
+                message was merged into the open turn.
+        """
+
+        speaker = str(speaker_id)
+        to = _as_id(target)
+        utterance_id = int(utterance_id)
+
+        if (
+            self._open is not None
+            and self._open["speaker_id"] == speaker
+            and self._open[self.target_col] == to
+        ):
+            self._open["utterance_ids"].append(utterance_id)
+            self._open["utterance"].append(utterance)
+            self._turn_of[utterance_id] = len(self._spk) - 1
+            return None
+
+        idx = len(self._spk)
+        spk = self._speakers.setdefault(speaker, len(self._speakers))
+        self._spk.append(spk)
+        self._reply.append(to)
+        self._turn_of[utterance_id] = idx
+
+        if self.target_col == "reply_to_id":
+            a, b, c, d = self._reply_label(idx, spk, to)
+        else:
+            a, b = self._last_label
+            c = spk
+            d = (
+                _GROUP
+                if to is None
+                else self._speakers.setdefault(str(to), len(self._speakers))
+            )
+        self._last_label = (c, d)
+
+        pshift = ""
+        if idx > 0:
+            label = int(_pshift_kernel(a, b, c, d))  # type: ignore
+            pshift = _pshift_labels[label]
+            if _pshift_label_codes[label] >= 0:
+                self._counts[_pshift_label_codes[label]] += 1
+
+        self._open = {
+            "utterance_ids": [utterance_id],
+            "speaker_id": speaker,
+            "utterance": [utterance],
+            self.target_col: to,
+            "pshift": pshift,
+        }
+        return pshift
+
+    def _reply_label(
+        self, idx: int, spk: int, reply: int | None
+    ) -> Tuple[int, int, int, int]:
+        # Speakers and targets of the previous (a to b) and current (c to d) labels of
+        # a new turn in reply mode, with the same rules as `_reply_labels()`
+        ref = -1 if reply is None else self._turn_of.get(reply, -1)
+
+        if ref < 0:
+            # unresolved replies repeat the label of the previous turn, except for
+            # the first turn
+            c, d = (spk, _GROUP) if reply is None or idx == 0 else self._last_label
+            return (*self._last_label, c, d)
+
+        ref_spk, ref_reply = self._spk[ref], self._reply[ref]
+        if ref_reply is None:
+            return ref_spk, _GROUP, spk, ref_spk
+
+        ref2 = self._turn_of.get(ref_reply, -1)
+        if 0 <= ref2 < idx:
+            return ref_spk, self._spk[ref2], spk, ref_spk
+        return (*self._last_label, spk, ref_spk)
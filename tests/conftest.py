@@ -101,8 +101,8 @@ _p_shift_cols_mandatory: dict[str, DTypeLike] = {
 
 # Optional columns and types of conversation data frame
 _p_shift_cols_optional: dict[str, DTypeLike] = {
-    "reply_to_id": np.dtype("O"),
-    "target_id": np.dtype("O"),
+    "reply_to_id": "Int64",
+    "target_id": "Int64",
 }
 
 
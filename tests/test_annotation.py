@@ -2,10 +2,24 @@
 # Distributed under the MIT License (See accompanying file LICENSE or copy
 # at http://opensource.org/licenses/MIT)
 
+import io
+from pathlib import Path
+
 import pandas as pd
 import pytest
 
-from parshift import annotate, pshift_class, read_ccsv
+from parshift import (
+    annotate,
+    cond_probs,
+    conv2turns,
+    pshift_class,
+    pshift_counts,
+    read_ccsv,
+    read_cfeather,
+    read_cparquet,
+    render_annotation,
+)
+from parshift.annotation import _pshift_codes
 
 
 def test_read_ccsv_return(file_csv_good, p_shift_cols_mandatory, p_shift_cols_optional):
@@ -37,6 +51,93 @@ def test_read_ccsv_errors(file_read_ccsv_bad):
         read_ccsv(file_read_ccsv_bad["csv_in"], **(file_read_ccsv_bad["kwargs"]))
 
 
+def test_read_ccsv_ids():
+    """Test that `read_ccsv()` converts ids into integers, with missing targets."""
+    csv = "utterance_id,speaker_id,utterance,reply_to_id\n0,a,x,\n1,b,y,0\n2,a,z,None\n"
+    df_conv = read_ccsv(io.StringIO(csv), keep_default_na=False)
+    assert df_conv["utterance_id"].dtype == "int64"
+    assert df_conv["reply_to_id"].dtype == "Int64"
+    assert df_conv["reply_to_id"].isna().tolist() == [True, False, True]
+
+
+@pytest.mark.parametrize(
+    "csv,message",
+    [
+        ("0,a,x,\n1,b,y,oops\n2,a,z,\n3,b,w,no\n", "`reply_to_id`.* rows 1, 3$"),
+        ("0,a,x,\nx,b,y,0\n", "`utterance_id`.* row 1$"),
+        ("0,a,x,\n,b,y,0\n", "`utterance_id` has missing ids in row 1$"),
+        ("0,a,x,\n1.5,b,y,0\n1.7,c,z,1\n", "`utterance_id`.* rows 1, 2$"),
+        ("0,a,x,\n1,b,y,0.5\n", "`reply_to_id`.* row 1$"),
+    ],
+)
+def test_read_ccsv_invalid_ids(csv, message):
+    """Test that invalid ids are reported with their rows."""
+    header = "utterance_id,speaker_id,utterance,reply_to_id\n"
+    with pytest.raises(ValueError, match=message):
+        read_ccsv(io.StringIO(header + csv))
+
+
+def test_read_ccsv_pyarrow(file_csv_good):
+    """Test that the pyarrow engine gives the same conversation."""
+    pytest.importorskip("pyarrow")
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    kwargs = {k: v for k, v in file_csv_good["kwargs"].items() if k == "sep"}
+    df_arrow = read_ccsv(file_csv_good["csv_in"], engine="pyarrow", **kwargs)
+    pd.testing.assert_frame_equal(df_arrow, df_conv)
+    df_arrow = read_ccsv(
+        file_csv_good["csv_in"], text=False, engine="pyarrow", **kwargs
+    )
+    pd.testing.assert_frame_equal(df_arrow, df_conv.drop(columns="utterance"))
+
+
+@pytest.mark.parametrize("format", ["parquet", "feather"])
+@pytest.mark.parametrize("dtype_backend", ["numpy_nullable", "pyarrow"])
+def test_read_columnar(file_csv_good, tmp_path, format, dtype_backend):
+    """Test that `read_cparquet()`/`read_cfeather()` give the same annotation as
+    `read_ccsv()`, reading the conversation columns only."""
+    pytest.importorskip("pyarrow")
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    filename = tmp_path / f"conv.{format}"
+    getattr(df_conv.assign(extra=1), f"to_{format}")(filename)
+    reader = read_cparquet if format == "parquet" else read_cfeather
+
+    df_read = reader(filename, dtype_backend=dtype_backend)
+    assert list(df_read.columns) == list(df_conv.columns)
+    pd.testing.assert_frame_equal(annotate(df_read), annotate(df_conv))
+
+    with open(filename, "rb") as buffer:
+        df_read = reader(buffer, columns=[*df_conv.columns, "extra"])
+    assert list(df_read.columns) == [*df_conv.columns, "extra"]
+
+    with pytest.raises(ValueError):
+        reader(filename, columns=["utterance_id", "speaker_id"])
+
+
+def test_conv2turns_return(file_csv_good):
+    """Test that `conv2turns()` groups messages into the expected turns."""
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+
+    # Read the expected results
+    parshift_annotation_df = pd.read_csv(file_csv_good["csv_out"], index_col=False)
+
+    turns = conv2turns(df_conv)
+    assert isinstance(turns, list)
+    assert len(turns) == len(parshift_annotation_df)
+    assert turns[4]["utterance_ids"] == [4, 5, 6]
+    assert turns[4]["utterance"] == "tá calado. ola. xiu"
+    assert turns[0][df_conv.columns[-1]] is None
+
+    # The data frame version should contain the same turns
+    turns_df = conv2turns(df_conv, as_frame=True)
+    assert isinstance(turns_df, pd.DataFrame)
+    assert list(turns_df.columns) == list(turns[0].keys())
+    assert turns_df["utterance_ids"].tolist() == [t["utterance_ids"] for t in turns]
+    assert turns_df["speaker_id"].tolist() == [t["speaker_id"] for t in turns]
+
+
 def test_annotate_return(file_csv_good):
     """Test that `annotate()` returns the expected data frame."""
 
@@ -66,6 +167,156 @@ def test_annotate_return(file_csv_good):
     ).all()
 
 
+def test_annotate_group_by(file_csv_good):
+    """Test that `annotate()` annotates several interleaved conversations at once."""
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    conv_annot = annotate(df_conv)
+
+    # Interleave two copies of the conversation
+    corpus = pd.concat(
+        [df_conv.assign(conversation_id="a"), df_conv.assign(conversation_id="b")]
+    ).sort_index(kind="stable")
+    corpus_annot = annotate(corpus, group_by="conversation_id")
+
+    assert list(corpus_annot.columns) == ["conversation_id"] + list(conv_annot.columns)
+    assert len(corpus_annot) == 2 * len(conv_annot)
+    for conv_id in ["a", "b"]:
+        pshifts = corpus_annot.loc[corpus_annot["conversation_id"] == conv_id, "pshift"]
+        assert (pshifts.values == conv_annot["pshift"].values).all()
+
+    # Turns are also obtained per conversation
+    turns = conv2turns(corpus, as_frame=True, group_by="conversation_id")
+    assert isinstance(turns, pd.DataFrame)
+    assert len(turns) == len(corpus_annot)
+
+
+def test_annotate_speaker_names(datapath):
+    """Test that `annotate()` doesn't depend on how speakers are named."""
+
+    df_read_ccsv = read_ccsv(Path(datapath, "conv_good.csv"))
+    conv_annot = annotate(df_read_ccsv)
+
+    # Rename speakers to names containing "to" and "group"
+    names = {"10": "toto", "11": "group", "12": "to to", "13": "otto"}
+    df_renamed = df_read_ccsv.copy()
+    df_renamed["speaker_id"] = df_renamed["speaker_id"].replace(names)
+    conv_annot_renamed = annotate(df_renamed)
+
+    assert (conv_annot["pshift"].values == conv_annot_renamed["pshift"].values).all()
+
+
+@pytest.mark.parametrize("group_by", [None, "conversation_id"])
+def test_annotate_compact(file_csv_good, group_by):
+    """Test that the compact annotation renders as the default one."""
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    if group_by is not None:
+        df_conv = pd.concat(
+            [df_conv.assign(conversation_id="a"), df_conv.assign(conversation_id="b")]
+        ).sort_index(kind="stable")
+    conv_annot = annotate(df_conv, group_by=group_by)
+    compact = annotate(df_conv, group_by=group_by, compact=True)
+
+    assert len(compact) == len(conv_annot)
+    assert list(compact["pshift"].cat.categories[:13]) == list(_pshift_codes)
+    assert compact["pshift"].isna().sum() == (conv_annot["pshift"] == "").sum()
+    assert (compact["stop"] - compact["start"] >= 1).all()
+    pd.testing.assert_frame_equal(
+        render_annotation(compact, df_conv, group_by=group_by), conv_annot
+    )
+    pd.testing.assert_frame_equal(cond_probs(compact), cond_probs(conv_annot))
+
+    empty = df_conv.iloc[:0]
+    compact = annotate(empty, group_by=group_by, compact=True)
+    assert len(compact) == 0
+    pd.testing.assert_frame_equal(
+        render_annotation(compact, empty, group_by=group_by),
+        annotate(empty, group_by=group_by),
+    )
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_annotate_text_free(file_csv_good, compact):
+    """Test that the text-free mode gives the same annotation, without texts."""
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    df_ids = read_ccsv(file_csv_good["csv_in"], text=False, **(file_csv_good["kwargs"]))
+    assert "utterance" not in df_ids.columns
+    pd.testing.assert_frame_equal(df_ids, df_conv.drop(columns="utterance"))
+
+    conv_annot = annotate(df_conv, compact=compact)
+    expected = conv_annot.drop(columns="utterance", errors="ignore")
+    pd.testing.assert_frame_equal(annotate(df_ids, compact=compact), expected)
+    pd.testing.assert_frame_equal(
+        annotate(df_conv, compact=compact, text=False), expected
+    )
+    pd.testing.assert_frame_equal(cond_probs(annotate(df_ids)), cond_probs(conv_annot))
+
+    turns = conv2turns(df_conv, text=False)
+    assert turns == [
+        {k: v for k, v in turn.items() if k != "utterance"}
+        for turn in conv2turns(df_conv)
+    ]
+    assert conv2turns(df_ids) == turns
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_annotate_interactions(file_csv_good, compact):
+    """Test the interactions and the pshift counts of each speaker."""
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    conv_annot, interactions, counts = annotate(
+        df_conv, compact=compact, interactions=True
+    )
+    pd.testing.assert_frame_equal(conv_annot, annotate(df_conv, compact=compact))
+
+    assert list(interactions.columns) == ["speaker_id", "addressee_id", "turns"]
+    assert list(interactions["speaker_id"].cat.categories) == list(counts.index)
+    assert (interactions["turns"] > 0).all()
+    assert not interactions.duplicated(["speaker_id", "addressee_id"]).any()
+    if "target_id" in df_conv.columns:
+        targets = conv_annot["target_id"].astype(object)
+        addressed = conv_annot[targets.notna() & (targets != "None")]
+        pairs = addressed.groupby(
+            [
+                addressed["speaker_id"].astype(str),
+                addressed["target_id"].astype(str),
+            ]
+        ).size()
+        assert dict(pairs) == {
+            (s, a): t for s, a, t in interactions.itertuples(index=False)
+        }
+
+    assert list(counts.columns.get_level_values("role").unique()) == [
+        "initiator",
+        "responder",
+    ]
+    for role in ["initiator", "responder"]:
+        assert list(counts[role].columns) == list(_pshift_codes)
+        pd.testing.assert_series_equal(
+            counts[role].sum(), pshift_counts(annotate(df_conv)), check_names=False
+        )
+
+    # Responders are the speakers of the turns and, in target mode, initiators
+    # are the speakers of the previous turns
+    pshifts = conv_annot["pshift"].astype(str)
+    speakers = conv_annot["speaker_id"].astype(str)
+    for speaker in counts.index:
+        expected = pshift_counts(pd.DataFrame({"pshift": pshifts[speakers == speaker]}))
+        assert counts.loc[speaker, "responder"].to_dict() == expected.to_dict()
+        if "target_id" in df_conv.columns:
+            previous = speakers.shift() == speaker
+            expected = pshift_counts(pd.DataFrame({"pshift": pshifts[previous]}))
+            assert counts.loc[speaker, "initiator"].to_dict() == expected.to_dict()
+
+
+def test_render_annotation_errors(file_csv_good):
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    with pytest.raises(ValueError):
+        render_annotation(annotate(df_conv), df_conv)
+
+
 @pytest.mark.parametrize(
     "conv,expecterr", [(10, TypeError), ("some_string", TypeError)]
 )
@@ -104,3 +355,38 @@ def test_pshift_type_errors(ps, expecterr):
     """Test that `pshift_type()` throws the expected errors."""
     with pytest.raises(expecterr):
         pshift_class(ps)
+
+
+def test_pshift_class_array(file_csv_good):
+    """Test that `pshift_class()` gives the class of each code in an array."""
+    codes = ["AB-BA", "A0-X0", "", "AB-X0", "AB-AY"]
+    expected = [pshift_class(ps) if ps else None for ps in codes]
+    assert pd.isna(pshift_class(codes)[2])
+    assert [c if isinstance(c, str) else None for c in pshift_class(codes)] == expected
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    pshifts = annotate(df_conv)["pshift"]
+    classes = pshift_class(pshifts)
+    assert isinstance(classes, pd.Series)
+    assert classes.index.equals(pshifts.index)
+    assert [c if isinstance(c, str) else "" for c in classes] == [
+        pshift_class(ps) if ps else "" for ps in pshifts
+    ]
+    compact = annotate(df_conv, compact=True)["pshift"]
+    pd.testing.assert_series_equal(pshift_class(compact), classes)
+
+    # Labels outside the 13 codes have no class, while other strings are invalid
+    assert pd.isna(pshift_class(["AB-BA", "A0-A0"])[1])
+    with pytest.raises(ValueError):
+        pshift_class(["AB-BA", "Bye"])
+
+
+def test_pshift_class_self_reply():
+    """Test that `pshift_class()` accepts annotations with labels outside the 13
+    participation shift codes, such as the one of a self-reply."""
+    csv = "utterance_id,speaker_id,utterance,reply_to_id\n0,a,x,\n1,b,y,0\n2,a,z,2\n"
+    pshifts = annotate(read_ccsv(io.StringIO(csv)))["pshift"]
+    assert pshifts.iloc[-1] not in _pshift_codes
+    classes = pshift_class(pshifts)
+    assert classes.iloc[1] == pshift_class(pshifts.iloc[1])
+    assert classes.iloc[[0, 2]].isna().all()
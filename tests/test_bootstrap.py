@@ -0,0 +1,96 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import parshift.bootstrap
+from parshift import bootstrap_propensities, cond_probs, propensities, pshift_counts
+
+
+@pytest.mark.parametrize("block_size", [None, 1, 3])
+def test_bootstrap_propensities(pshift_freq_table, block_size):
+    """Test that the estimates are the propensities, within their intervals."""
+    annotation = pshift_freq_table["df_ps"]
+    result = bootstrap_propensities(
+        annotation, n_resamples=200, block_size=block_size, seed=1
+    )
+    assert list(result.index) == ["estimate", "lower", "upper"]
+    pd.testing.assert_frame_equal(
+        result.loc[["estimate"]].reset_index(drop=True),
+        propensities(cond_probs(annotation)),
+    )
+    assert (result.loc["lower"] <= result.loc["upper"]).all()
+
+    # Same seed, same intervals
+    pd.testing.assert_frame_equal(
+        bootstrap_propensities(
+            annotation, n_resamples=200, block_size=block_size, seed=1
+        ),
+        result,
+    )
+
+
+def test_bootstrap_propensities_counts(pshift_freq_table):
+    """Test that counts give the same bootstrap as the annotation."""
+    annotation = pshift_freq_table["df_ps"]
+    pd.testing.assert_frame_equal(
+        bootstrap_propensities(pshift_counts(annotation), seed=2),
+        bootstrap_propensities(annotation, seed=2),
+    )
+
+
+def test_bootstrap_propensities_unrounded():
+    """Test that intervals are not limited to the rounding of the estimate."""
+    counts = pshift_counts()
+    counts[["A0-XA", "A0-X0", "AB-BA", "AB-XA"]] = [700, 300, 500, 500]
+    result = bootstrap_propensities(counts, n_resamples=200, seed=0)
+    assert result.loc["estimate", "turn-receiving"] == 0.5
+    bounds = result.loc[["lower", "upper"], "turn-receiving"].to_numpy() * 100
+    assert (np.abs(bounds - np.round(bounds)) > 1e-6).all()
+
+
+def test_block_counts():
+    """Test that the counts of each resample are the ones of its blocks."""
+    rng = np.random.default_rng(0)
+    codes = rng.integers(0, 13, 50)
+    starts = rng.integers(0, 50 - 7 + 1, size=(20, 8))
+
+    counts = parshift.bootstrap._block_counts(starts, codes, 7)
+    for row, resample in zip(counts, starts):
+        turns = np.concatenate([codes[s : s + 7] for s in resample])[:50]
+        assert (row == np.bincount(turns, minlength=13)).all()
+
+
+def test_bootstrap_propensities_workers(pshift_freq_table):
+    annotation = pshift_freq_table["df_ps"]
+    pd.testing.assert_frame_equal(
+        bootstrap_propensities(
+            annotation, n_resamples=50, block_size=2, seed=3, max_workers=2
+        ),
+        bootstrap_propensities(annotation, n_resamples=50, block_size=2, seed=3),
+    )
+
+
+@pytest.mark.parametrize(
+    "pscodes,kwargs,expecterr",
+    [
+        (1, {}, TypeError),
+        (None, {"n_resamples": 0}, ValueError),
+        (None, {"confidence": 1}, ValueError),
+        (None, {"block_size": 0}, ValueError),
+        (None, {"block_size": 10**6}, ValueError),
+        (pshift_counts(), {}, ValueError),
+        ("counts", {"block_size": 2}, ValueError),
+    ],
+)
+def test_bootstrap_propensities_errors(pshift_freq_table, pscodes, kwargs, expecterr):
+    annotation = pshift_freq_table["df_ps"]
+    if pscodes is None:
+        pscodes = annotation
+    elif isinstance(pscodes, str):
+        pscodes = pshift_counts(annotation)
+    with pytest.raises(expecterr):
+        bootstrap_propensities(pscodes, **kwargs)
@@ -0,0 +1,120 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+import io
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import parshift.cache
+import parshift.oo_parshift
+from parshift import Cache, Parshift
+from parshift.cache import _input_digest, cache_key
+
+
+def test_cache_key():
+    key = cache_key(b"conversation", N=1)
+    assert key == cache_key(b"conversation", N=1)
+    assert key != cache_key(b"conversation", N=2)
+    assert key != cache_key(b"other conversation", N=1)
+
+
+def test_cache_key_versions(monkeypatch):
+    """Test that keys change with the pandas and NumPy versions."""
+    key = cache_key(b"conversation", N=1)
+    monkeypatch.setattr(pd, "__version__", "0.0")
+    assert key != cache_key(b"conversation", N=1)
+    monkeypatch.setattr(np, "__version__", "0.0")
+    assert key != cache_key(b"conversation", N=1)
+
+
+def test_input_digest(tmp_path, monkeypatch):
+    """Test that files are hashed in blocks, with the same digest as buffers."""
+    monkeypatch.setattr(parshift.cache, "_BLOCK_SIZE", 7)
+    data = b"utterance_id,speaker_id\n" * 10
+    path = tmp_path / "conversation.csv"
+    path.write_bytes(data)
+
+    digest, source = _input_digest(path)
+    assert source == path
+    for buffer in [io.BytesIO(data), io.StringIO(data.decode())]:
+        buffer_digest, source = _input_digest(buffer)
+        assert buffer_digest == digest
+        assert source.read() == buffer.getvalue()
+
+
+def test_cache_get_put(tmp_path):
+    cache = Cache(tmp_path / "cache")
+    assert cache.get("a") is None
+    cache.put("a", {"value": 1})
+    assert cache.get("a") == {"value": 1}
+    cache.clear()
+    assert cache.get("a") is None
+
+
+def test_cache_eviction(tmp_path):
+    cache = Cache(tmp_path, max_size=10000)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.put(key, bytes(3000))
+        os.utime(tmp_path / f"{key}.pkl", (i, i))
+
+    # "a" is used, so "b" is the least recently used entry
+    assert cache.get("a") is not None
+    cache.put("d", bytes(3000))
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ["a", "c", "d"])
+
+
+@pytest.mark.parametrize(
+    "contents",
+    [
+        b"",
+        b"not a pickle",
+        pickle.dumps(Cache)[:-5],
+        pickle.dumps(Cache).replace(b"parshift.cache", b"parshift.nocache"),
+    ],
+)
+def test_cache_bad_entry(tmp_path, contents):
+    """Test that entries which can't be loaded are missing and removed."""
+    cache = Cache(tmp_path)
+    (tmp_path / "a.pkl").write_bytes(contents)
+    assert cache.get("a") is None
+    assert not (tmp_path / "a.pkl").exists()
+
+
+def test_cache_errors(tmp_path):
+    with pytest.raises(ValueError):
+        Cache(tmp_path, max_size=-1)
+
+
+def test_process_cache(file_csv_good, tmp_path, monkeypatch):
+    """Test that `Parshift.process()` reuses cached results for the same file."""
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+
+    cached = Parshift()
+    cached.process(file_csv_good["csv_in"], cache=tmp_path, **(file_csv_good["kwargs"]))
+    pd.testing.assert_frame_equal(cached.annotation, model.annotation)
+    pd.testing.assert_frame_equal(cached.stats, model.stats)
+    assert len(list(tmp_path.glob("*.pkl"))) == 1
+
+    # Cache hits don't read the conversation file, even from a buffer
+    def fail(*args, **kwargs):
+        raise AssertionError("read_ccsv() should not be called")
+
+    monkeypatch.setattr(parshift.oo_parshift, "read_ccsv", fail)
+    with open(file_csv_good["csv_in"], "rb") as file:
+        buffer = io.BytesIO(file.read())
+    cached = Parshift()
+    cached.process(buffer, cache=Cache(tmp_path), **(file_csv_good["kwargs"]))
+    pd.testing.assert_frame_equal(cached.annotation, model.annotation)
+
+    # Different parameters are a cache miss
+    with pytest.raises(AssertionError):
+        cached.process(
+            file_csv_good["csv_in"], N=2, cache=tmp_path, **(file_csv_good["kwargs"])
+        )
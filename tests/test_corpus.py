@@ -0,0 +1,61 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from parshift import annotate, cond_probs, process_many, propensities, read_ccsv
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_process_many_files(datapath, max_workers):
+    """Test that `process_many()` processes a sequence of files."""
+    files = [
+        Path(datapath, "conv_good.csv"),
+        Path(datapath, "conv_good_target_id.csv"),
+    ]
+    stats, props = process_many(files, max_workers=max_workers)
+
+    assert list(props.index) == [str(f) for f in files]
+    assert list(props.columns) == ["turn-receiving", "targeting", "termination"]
+    assert stats.shape == (2 * 13, 7)
+
+    # Statistics should be the same as obtained for each conversation
+    for f in files:
+        expected = cond_probs(annotate(read_ccsv(f)))
+        pd.testing.assert_frame_equal(
+            stats.loc[str(f)].reset_index(drop=True), expected
+        )
+        pd.testing.assert_frame_equal(
+            props.loc[[str(f)]].reset_index(drop=True), propensities(expected)
+        )
+
+
+def test_process_many_data_frame(datapath):
+    """Test that `process_many()` processes a data frame with many conversations."""
+    conv = read_ccsv(Path(datapath, "conv_good.csv"))
+    corpus = pd.concat(
+        [conv.assign(conversation_id="a"), conv.assign(conversation_id="b")]
+    )
+    stats, props = process_many(corpus, max_workers=1)
+    assert list(props.index) == ["a", "b"]
+    assert (props.loc["a"] == props.loc["b"]).all()
+
+    # Mappings of keys to conversations are also accepted
+    _, props = process_many({"x": Path(datapath, "conv_good.csv")}, max_workers=1)
+    assert list(props.index) == ["x"]
+
+
+@pytest.mark.parametrize(
+    "convs,expecterr", [(10, TypeError), ("some_string", TypeError)]
+)
+def test_process_many_errors(convs, expecterr):
+    """Test errors raised by `process_many()`."""
+    with pytest.raises(expecterr):
+        process_many(convs)
+
+    with pytest.raises(ValueError):
+        process_many(pd.DataFrame({"speaker_id": []}))
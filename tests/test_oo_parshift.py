@@ -9,7 +9,15 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import pytest
 
-from parshift import Parshift
+import parshift.oo_parshift
+from parshift import (
+    Parshift,
+    annotate,
+    cond_probs,
+    propensities,
+    pshift_class,
+    read_ccsv,
+)
 
 
 def test_process(file_csv_good):
@@ -25,11 +33,109 @@ def test_process(file_csv_good):
     assert isinstance(model.stats, list)
 
 
-@pytest.mark.parametrize("N,expecterr", [(5, ValueError)])
-def test_process_error(file_csv_good, N, expecterr):
+@pytest.mark.parametrize("N", [2, 3, 5, 100])
+def test_process_parts(file_csv_good, N):
+    """Test that the statistics of each part are the ones of its turns."""
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]), N=N)
+    assert isinstance(model.stats, list)
+    assert len(model.stats) == N
+
+    size = len(model.annotation)
+    for i, stats in enumerate(model.stats):
+        part = model.annotation.iloc[int(size / N * i) : int(size / N * (i + 1))]
+        pd.testing.assert_frame_equal(stats, cond_probs(part))
+
+
+def test_process_boundaries(file_csv_good):
+    model = Parshift()
+    model.process(
+        file_csv_good["csv_in"], **(file_csv_good["kwargs"]), boundaries=[2, 2, 5]
+    )
+    assert len(model.stats) == 4
+    pd.testing.assert_frame_equal(
+        model.stats[2], cond_probs(model.annotation.iloc[2:5])
+    )
+    pd.testing.assert_frame_equal(model.stats[3], cond_probs(model.annotation.iloc[5:]))
+
+
+def test_process_text_free(file_csv_good):
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    text_free = Parshift()
+    text_free.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]), text=False)
+    assert "utterance" not in text_free.annotation.columns
+    pd.testing.assert_frame_equal(text_free.stats, model.stats)
+
+
+def test_process_interactions(file_csv_good, tmp_path):
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    assert model.interactions is None and model.speaker_counts is None
+
+    df_conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    _, interactions, counts = annotate(df_conv, interactions=True)
+    for _ in range(2):
+        model.process(
+            file_csv_good["csv_in"],
+            **(file_csv_good["kwargs"]),
+            interactions=True,
+            cache=tmp_path,
+        )
+        pd.testing.assert_frame_equal(model.interactions, interactions)
+        pd.testing.assert_frame_equal(model.speaker_counts, counts)
+
+    model.annotation = model.annotation.iloc[:3]
+    assert model.interactions is None
+
+
+def test_get_speaker_profiles(file_csv_good):
+    """Test that the profile of each speaker is the one of their turns."""
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    with pytest.raises(ValueError):
+        model.get_speaker_profiles()
+
+    model.process(
+        file_csv_good["csv_in"], **(file_csv_good["kwargs"]), interactions=True
+    )
+    profiles = model.get_speaker_profiles()
+    assert list(profiles.index) == list(model.speaker_counts.index)
+    assert list(profiles.columns.unique("role")) == ["initiator", "responder"]
+
+    annotation = model.annotation.astype({"pshift": str, "speaker_id": str})
+    for speaker, profile in profiles["responder"].iterrows():
+        stats = cond_probs(annotation[annotation["speaker_id"] == speaker])
+        assert profile[stats["Pshift"]].tolist() == stats["Frequency"].tolist()
+        classes = stats["Pshift"].map(pshift_class)
+        for cls, frequency in stats.groupby(classes)["Frequency"].sum().items():
+            assert profile[cls] == frequency
+        expected = propensities(stats).iloc[0]
+        assert profile[expected.index].tolist() == expected.tolist()
+    for role in ["initiator", "responder"]:
+        assert (
+            profiles[role][list(model.speaker_counts[role].columns)].to_numpy()
+            == model.speaker_counts[role].to_numpy()
+        ).all()
+
+    profiles.iloc[0, 0] = -1
+    assert (model.get_speaker_profiles() != -1).all().all()
+
+
+@pytest.mark.parametrize(
+    "kwargs,expecterr",
+    [
+        ({"N": 0}, ValueError),
+        ({"N": 2.5}, ValueError),
+        ({"boundaries": [3, 1]}, ValueError),
+        ({"boundaries": [1000]}, ValueError),
+        ({"boundaries": [2.5]}, ValueError),
+    ],
+)
+def test_process_error(file_csv_good, kwargs, expecterr):
     model = Parshift()
     with pytest.raises(expecterr):
-        model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]), N=N)
+        model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]), **kwargs)
 
 
 def test_show_plot(file_csv_good, monkeypatch):
@@ -113,3 +219,73 @@ def test_get_propensities(file_csv_good):
     assert path.exists("test_propensities.csv")
     if path.exists("test_propensities.csv"):
         os.remove("test_propensities.csv")
+
+
+@pytest.mark.parametrize("format", ["parquet", "feather"])
+def test_write_load(file_csv_good, tmp_path, format):
+    pytest.importorskip("pyarrow")
+
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    model.write_annotation(str(tmp_path / "annotation"), format=format)
+    model.write_stats(str(tmp_path / "stats"), format=format)
+    assert path.exists(tmp_path / f"stats.{format}")
+
+    loaded = Parshift()
+    loaded.load(tmp_path / f"annotation.{format}", format=format)
+    pd.testing.assert_frame_equal(loaded.annotation, model.annotation)
+    pd.testing.assert_frame_equal(loaded.stats, model.stats)
+
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]), N=2)
+    model.write_stats(str(tmp_path / f"stats.{format}"), format=format)
+    for i in range(2):
+        assert path.exists(tmp_path / f"stats_n{i+1}.{format}")
+
+
+def test_write_errors(file_csv_good, tmp_path):
+    model = Parshift()
+    with pytest.raises(ValueError):
+        model.write_annotation(str(tmp_path / "annotation"))
+    with pytest.raises(ValueError):
+        model.write_stats(str(tmp_path / "stats"))
+
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    with pytest.raises(ValueError):
+        model.write_annotation(str(tmp_path / "annotation"), format="csv")
+
+
+def test_derived_results(file_csv_good, monkeypatch):
+    """Test that derived results are determined once, until the annotation changes."""
+    calls = []
+
+    def counted_propensities(stats):
+        calls.append(stats)
+        return propensities(stats)
+
+    monkeypatch.setattr(parshift.oo_parshift, "propensities", counted_propensities)
+
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]), N=2)
+    first = model.get_propensities()
+    first.iloc[0, 0] = -1
+    pd.testing.assert_frame_equal(model.get_propensities(), model.get_propensities())
+    assert (model.get_propensities() != -1).all().all()
+    assert len(calls) == 2
+
+    # A new annotation invalidates the stats, which are split as before
+    model.annotation = model.annotation.iloc[:4]
+    assert len(model.stats) == 2
+    pd.testing.assert_frame_equal(
+        model.stats[1], cond_probs(model.annotation.iloc[2:4])
+    )
+    model.get_propensities()
+    assert len(calls) == 4
+
+    # Stats are determined from an annotation given on initialization
+    model = Parshift(annotation=model.annotation)
+    pd.testing.assert_frame_equal(model.stats, cond_probs(model.annotation))
+
+    # In place changes require an explicit invalidation
+    model.annotation["pshift"] = ""
+    model.invalidate()
+    assert model.stats["Frequency"].sum() == 0
@@ -2,6 +2,9 @@
 # Distributed under the MIT License (See accompanying file LICENSE or copy
 # at http://opensource.org/licenses/MIT)
 
+import subprocess
+import sys
+
 import matplotlib.pyplot as plt
 import pytest
 
@@ -22,3 +25,12 @@ def test_frequency_treemap_errors(pshift_freq_table, type, expecterr):
     conditional_probabilities_df = cond_probs(pshift_freq_table["df_ps"])
     with pytest.raises(expecterr):
         frequency_treemap(conditional_probabilities_df, type=type)
+
+
+def test_lazy_import():
+    """Test that importing ParShift doesn't import the plotting dependencies."""
+    code = (
+        "import sys, parshift; "
+        "assert not {'matplotlib', 'squarify'} & set(sys.modules), sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,84 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+import tracemalloc
+
+import pandas as pd
+import pytest
+
+from parshift import Parshift, annotate, cond_probs, profile, read_ccsv
+
+
+def test_profile(file_csv_good):
+    """Test that `profile()` records the stages run within it, in order."""
+    observed = []
+
+    with profile(observer=observed.append) as recording:
+        conv = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+        annotation = annotate(conv)
+        cond_probs(annotation)
+
+    # Stages run outside the context aren't recorded
+    annotate(conv)
+
+    report = recording.report()
+    assert list(report["stage"]) == [
+        "read_ccsv",
+        "annotate",
+        "turns",
+        "pshifts",
+        "cond_probs",
+    ]
+    assert list(report["level"]) == [0, 0, 1, 1, 0]
+    assert list(report["rows_out"]) == [len(conv)] + [len(annotation)] * 3 + [13]
+    assert report.loc[1, "rows_in"] == len(conv)
+    assert (report["wall_time"] >= 0).all()
+    assert (report["peak_memory"] > 0).all()
+    assert not tracemalloc.is_tracing()
+
+    # The observer gets the records as stages finish
+    assert [record["stage"] for record in observed] == [
+        "read_ccsv",
+        "turns",
+        "pshifts",
+        "annotate",
+        "cond_probs",
+    ]
+
+    # The peak memory of a stage includes the one of its sub-stages
+    assert report.loc[1, "peak_memory"] >= report.loc[2:3, "peak_memory"].max()
+
+
+def test_profile_no_memory(file_csv_good):
+    with profile(memory=False) as recording:
+        read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    assert recording.report()["peak_memory"].isna().all()
+
+
+def test_profile_errors(datapath):
+    """Test that stages raising errors are still recorded."""
+    with profile() as recording:
+        with pytest.raises(ValueError):
+            read_ccsv(datapath / "conv_missing_id.csv")
+    assert list(recording.report()["stage"]) == ["read_ccsv"]
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize("N", [1, 2])
+def test_process_profile(file_csv_good, N):
+    model = Parshift()
+    model.process(file_csv_good["csv_in"], **(file_csv_good["kwargs"]), N=N)
+    assert model.profile is None
+
+    model.process(
+        file_csv_good["csv_in"], **(file_csv_good["kwargs"]), N=N, profile=True
+    )
+    assert isinstance(model.profile, pd.DataFrame)
+    assert list(model.profile["stage"][:4]) == [
+        "read_ccsv",
+        "annotate",
+        "turns",
+        "pshifts",
+    ]
+    assert "stats" in list(model.profile["stage"])
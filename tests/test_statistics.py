@@ -2,18 +2,17 @@
 # Distributed under the MIT License (See accompanying file LICENSE or copy
 # at http://opensource.org/licenses/MIT)
 
+import numpy as np
 import pandas as pd
 import pytest
 
-from parshift import cond_probs, propensities
-from parshift.statistics import _frequency_table
-
-
-def test_frequency_table(pshift_freq_table):
-    result = _frequency_table(pshift_freq_table["df_ps"])
-    assert isinstance(result, list)
-    assert len(result) == 5
-    assert result[0] == pshift_freq_table["freq_table"]
+from parshift import (
+    batch_stats,
+    cond_probs,
+    propensities,
+    pshift_counts,
+    rolling_stats,
+)
 
 
 def test_cond_probs_ok(pshift_freq_table):
@@ -28,6 +27,11 @@ def test_cond_probs_ok(pshift_freq_table):
         "Change of Speaker (C)",
         "Directed Remark (D)",
     ]
+    freq_table = pshift_freq_table["freq_table"]
+    assert dict(zip(result["Pshift"], result["Frequency"])) == freq_table
+    assert result.loc[result["Pshift"] == "A0-XA", "P(S|D)"].item() == round(
+        freq_table["A0-XA"] / (freq_table["A0-XA"] + freq_table["A0-X0"]), 2
+    )
 
 
 @pytest.mark.parametrize(
@@ -43,3 +47,116 @@ def test_propensities(pshift_freq_table):
     result = propensities(cond_probs_df)
     assert isinstance(result, pd.DataFrame)
     assert list(result.columns) == ["turn-receiving", "targeting", "termination"]
+
+
+def test_pshift_counts(pshift_freq_table):
+    result = pshift_counts(pshift_freq_table["df_ps"])
+    freq_table = pshift_freq_table["freq_table"]
+    assert isinstance(result, pd.Series)
+    assert result.to_dict() == freq_table
+    a0 = result.index.str.startswith("A0")
+    assert result[a0].sum() == sum(v for k, v in freq_table.items() if k[:2] == "A0")
+    assert result[~a0].sum() == sum(v for k, v in freq_table.items() if k[:2] == "AB")
+    assert (pshift_counts() == 0).all()
+
+
+@pytest.mark.parametrize("pscodes,expecterr", [(1, TypeError), ("Bye", TypeError)])
+def test_pshift_counts_errors(pscodes, expecterr):
+    with pytest.raises(expecterr):
+        pshift_counts(pscodes)
+
+
+@pytest.mark.parametrize("window", [1, 3, 100])
+def test_rolling_stats(pshift_freq_table, window):
+    annotation = pshift_freq_table["df_ps"]
+    stats, props = rolling_stats(annotation, window)
+    assert list(stats.index) == list(annotation.index)
+    assert list(props.index) == list(annotation.index)
+
+    # Each window gives the same statistics as the respective slice of turns
+    for i in range(len(annotation)):
+        expected = cond_probs(annotation.iloc[max(0, i + 1 - window) : i + 1])
+        assert stats.iloc[i]["Frequency"].tolist() == expected["Frequency"].tolist()
+        assert stats.iloc[i]["P(S|D)"].tolist() == expected["P(S|D)"].tolist()
+        assert props.iloc[i].tolist() == propensities(expected).iloc[0].tolist()
+
+
+def test_rolling_stats_times(pshift_freq_table):
+    annotation = pshift_freq_table["df_ps"]
+    times = pd.date_range("2023-01-01", periods=len(annotation), freq="1min")
+    stats, props = rolling_stats(annotation, "150s", times=times, step=2)
+    assert list(stats.index) == list(times[::2])
+
+    # Windows of 150 seconds contain the last three turns
+    expected, _ = rolling_stats(annotation, 3, step=2)
+    pd.testing.assert_frame_equal(
+        stats.reset_index(drop=True), expected.reset_index(drop=True)
+    )
+
+
+@pytest.mark.parametrize(
+    "pscodes,kwargs,expecterr",
+    [
+        (1, {"window": 2}, TypeError),
+        (None, {"window": 0}, ValueError),
+        (None, {"window": 2, "step": 0}, ValueError),
+        (None, {"window": "1min", "times": [1, 2]}, ValueError),
+        (None, {"window": 2, "times": "reversed"}, ValueError),
+    ],
+)
+def test_rolling_stats_errors(pshift_freq_table, pscodes, kwargs, expecterr):
+    annotation = pshift_freq_table["df_ps"]
+    if kwargs.get("times") == "reversed":
+        kwargs["times"] = list(range(len(annotation)))[::-1]
+    with pytest.raises(expecterr):
+        rolling_stats(annotation if pscodes is None else pscodes, **kwargs)
+
+
+def test_batch_stats(pshift_freq_table):
+    """Test that the statistics of each conversation are the ones of `cond_probs()`
+    and `propensities()`."""
+    annotation = pshift_freq_table["df_ps"]
+    size = len(annotation)
+    grouped = annotation.assign(
+        conversation_id=["a"] * (size // 3) + ["b"] * (size - size // 3)
+    )
+    counts = pshift_counts(grouped, group_by="conversation_id")
+    assert list(counts.index) == ["a", "b"]
+
+    for pscodes, kwargs in [
+        (grouped, {"group_by": "conversation_id"}),
+        (counts, {}),
+        (counts.iloc[:, ::-1], {}),
+    ]:
+        stats, props = batch_stats(pscodes, **kwargs)
+        assert list(props.index) == ["a", "b"]
+        assert stats.index.names == ["conversation_id", "Pshift"]
+        for key, part in grouped.groupby("conversation_id"):
+            expected = cond_probs(part)
+            result = stats.loc[key]
+            assert list(result.index) == list(expected["Pshift"])
+            for col in ["Frequency", "Probability", "P(S|D)"]:
+                assert list(result[col]) == list(expected[col])
+            assert list(result["P(S|D,C)"].fillna("")) == list(expected["P(S|D,C)"])
+            pd.testing.assert_frame_equal(
+                props.loc[[key]].reset_index(drop=True), propensities(expected)
+            )
+
+    stats, props = batch_stats(counts.reset_index(drop=True))
+    assert list(props.index) == [0, 1]
+    assert props.index.name == "conversation"
+    assert len(stats) == 26
+
+
+@pytest.mark.parametrize(
+    "pscodes,kwargs,expecterr",
+    [
+        (1, {}, TypeError),
+        (np.zeros((2, 13)), {}, TypeError),
+        (pd.DataFrame({"AB-BA": [1], "Bye": [2]}), {}, ValueError),
+        (np.zeros((2, 13)), {"group_by": "conversation_id"}, TypeError),
+    ],
+)
+def test_batch_stats_errors(pscodes, kwargs, expecterr):
+    with pytest.raises(expecterr):
+        batch_stats(pscodes, **kwargs)
@@ -0,0 +1,106 @@
+# Copyright (c) 2022-2023 Bruno Saraiva and contributors
+# Distributed under the MIT License (See accompanying file LICENSE or copy
+# at http://opensource.org/licenses/MIT)
+
+import pandas as pd
+import pytest
+
+from parshift import (
+    OnlineAnnotator,
+    annotate,
+    annotate_chunks,
+    cond_probs,
+    propensities,
+    pshift_counts,
+    read_ccsv,
+)
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 3, 100])
+def test_annotate_chunks(file_csv_good, chunksize):
+    """Test that `annotate_chunks()` yields the same annotation as `annotate()`."""
+
+    expected = annotate(read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"])))
+
+    counts = pshift_counts()
+    chunks = list(
+        annotate_chunks(
+            file_csv_good["csv_in"],
+            chunksize=chunksize,
+            counts=counts,
+            **(file_csv_good["kwargs"]),
+        )
+    )
+    annotation = pd.concat(chunks)
+
+    assert all(len(chunk) <= chunksize for chunk in chunks)
+    assert list(annotation.columns) == list(expected.columns)
+    assert list(annotation.index) == list(expected.index)
+    assert (annotation["pshift"].values == expected["pshift"].values).all()
+    assert (
+        annotation["utterance_ids"].values == expected["utterance_ids"].values
+    ).all()
+
+    # The running frequency table gives the same statistics as the full annotation
+    assert counts.equals(pshift_counts(expected))
+    pd.testing.assert_frame_equal(cond_probs(counts), cond_probs(expected))
+
+
+def test_annotate_chunks_errors(datapath):
+    """Test that `annotate_chunks()` validates the conversation file."""
+    with pytest.raises(ValueError):
+        list(annotate_chunks(datapath / "conv_missing_id.csv"))
+
+
+def test_online_annotator(file_csv_good):
+    """Test that `OnlineAnnotator` yields the same annotation as `annotate()`."""
+
+    conversation = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    expected = annotate(conversation)
+    target_col = str(conversation.columns[-1])
+
+    online = OnlineAnnotator(target_col)
+    assert online.open_turn is None
+    pshifts = []
+    for message in conversation.to_dict("records"):
+        pshift = online.add(
+            message["utterance_id"],
+            message["speaker_id"],
+            message["utterance"],
+            message[target_col],
+        )
+        if pshift is not None:
+            pshifts.append(pshift)
+
+    assert pshifts == list(expected["pshift"])
+    assert online.n_turns == len(expected)
+    assert online.open_turn["pshift"] == expected["pshift"].iloc[-1]
+    assert online.open_turn["utterance"] == expected["utterance"].iloc[-1]
+
+    # Statistics are available without the annotation
+    assert online.counts().equals(pshift_counts(expected))
+    pd.testing.assert_frame_equal(online.cond_probs(), cond_probs(expected))
+    pd.testing.assert_frame_equal(
+        online.propensities(), propensities(cond_probs(expected))
+    )
+
+
+def test_online_annotator_rows(file_csv_good):
+    """Test that `OnlineAnnotator` accepts the values of `read_ccsv()` rows, where
+    missing targets are `pd.NA`."""
+
+    conversation = read_ccsv(file_csv_good["csv_in"], **(file_csv_good["kwargs"]))
+    online = OnlineAnnotator(str(conversation.columns[-1]))
+    pshifts = []
+    for message in conversation.itertuples(index=False):
+        pshift = online.add(*message)
+        if pshift is not None:
+            pshifts.append(pshift)
+
+    assert pshifts == list(annotate(conversation)["pshift"])
+
+
+def test_online_annotator_errors():
+    """Test that `OnlineAnnotator` validates the target column."""
+    with pytest.raises(ValueError):
+        OnlineAnnotator("utterance")